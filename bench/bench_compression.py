@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# bench/bench_compression.py
+"""Бенчмарк сжатия ответов: сколько байт экономится на каждом эндпоинте и ценой какого CPU.
+
+Берёт настоящие JSON-файлы проекта (в копии во временном каталоге), получает
+несжатые ответы HTML- и JSON-эндпоинтов, затем сжимает каждое тело gzip и
+brotli с текущими настройками COMPRESS_* и замеряет процессорное время на
+один ответ. Пример:
+
+    python bench/bench_compression.py --json compression.json
+    COMPRESS_BR_QUALITY=6 python bench/bench_compression.py --compare compression.json
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from benchlib import REPO_ROOT, add_repo_to_path, compare_results, summarize, write_results
+
+add_repo_to_path()
+
+def endpoint_cases(web_app):
+    """Эндпоинты: имя → (метод, адрес, параметры, нужен ли вход в админку)"""
+    question = next(iter(web_app.KNOWLEDGE_BASE), "привет")
+    topic = next(iter(web_app.suggestionMap), "default")
+    return {
+        "GET /": ("GET", "/", {}, False),
+        "GET /booking": ("GET", "/booking", {}, False),
+        "GET /menu-items": ("GET", "/menu-items", {}, False),
+        "GET /api/menu-display": ("GET", "/api/menu-display", {}, False),
+        "GET /suggestions/<topic>": ("GET", f"/suggestions/{topic}", {}, False),
+        "POST /chat": ("POST", "/chat", {"json": {"message": question}}, False),
+        "GET /metrics": ("GET", "/metrics", {}, False),
+        "GET /admin/login": ("GET", "/admin/login", {}, False),
+        "GET /admin": ("GET", "/admin", {}, True),
+        "GET /admin/knowledge": ("GET", "/admin/knowledge", {}, True),
+        "GET /admin/menu": ("GET", "/admin/menu", {}, True),
+    }
+
+def measure_cpu(compression, body, encoding, iterations):
+    """Процессорное время сжатия одного тела, мс"""
+    samples = []
+    for _ in range(iterations):
+        started = time.process_time()
+        compression.compress(body, encoding)
+        samples.append((time.process_time() - started) * 1000)
+    return summarize(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Экономия байт и стоимость сжатия ответов по эндпоинтам")
+    parser.add_argument("--iterations", type=int, default=50, help="Повторов сжатия на эндпоинт")
+    parser.add_argument("--json", help="Сохранить результаты в JSON")
+    parser.add_argument("--compare", help="Сравнить с сохранённым JSON")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="dspace_compression_")
+    repo_cwd = os.getcwd()
+    for path in glob.glob(os.path.join(REPO_ROOT, "*.json")):
+        shutil.copy2(path, root)
+    os.chdir(root)
+    os.environ.setdefault("SNAPSHOT_AUTO_REBUILD", "false")
+    os.environ.setdefault("LOG_STDOUT", "false")
+
+    try:
+        import web_app
+        from utils import compression
+        web_app.call_yandex_gpt = lambda prompt, history=None, **kwargs: "🤖 Заглушка GPT"
+        client = web_app.app.test_client()
+        with client.session_transaction() as sess:
+            sess["admin_logged_in"] = True
+        client.get("/")  # загрузка данных
+
+        encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+        if compression.brotli is None:
+            print("ℹ️ Пакет brotli не установлен — замеряется только gzip")
+
+        results = {}
+        for name, (method, url, kwargs, _admin) in endpoint_cases(web_app).items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                response = client.open(url, method=method, headers={"Accept-Encoding": "identity"}, **kwargs)
+            body = response.get_data()
+            if response.status_code != 200:
+                print(f"⚠️ {name}: HTTP {response.status_code}, пропущен")
+                continue
+            for encoding in encodings:
+                encoded = compression.compress(body, encoding)
+                row = measure_cpu(compression, body, encoding, args.iterations)
+                row.update({
+                    "raw_bytes": len(body),
+                    "encoded_bytes": len(encoded),
+                    "saved_pct": round((1 - len(encoded) / len(body)) * 100, 1) if body else 0.0,
+                    "compressed_by_middleware": len(body) >= compression.COMPRESS_MIN_SIZE
+                                                and response.mimetype in compression.COMPRESSIBLE_MIMETYPES,
+                })
+                results[f"{name} [{encoding}]"] = row
+    finally:
+        os.chdir(repo_cwd)
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(f"\n  {'эндпоинт [кодировка]':<40}{'байт':>10}{'сжато':>10}{'экономия':>10}{'CPU p50 мс':>12}{'CPU p95 мс':>12}  сжимается")
+    for name, row in results.items():
+        flag = "да" if row["compressed_by_middleware"] else "нет"
+        print(f"  {name:<40}{row['raw_bytes']:>10}{row['encoded_bytes']:>10}{row['saved_pct']:>9.1f}%"
+              f"{row['p50_ms']:>12.3f}{row['p95_ms']:>12.3f}  {flag}")
+
+    if args.json:
+        write_results(args.json, "compression", results)
+    if args.compare:
+        compare_results(args.compare, results, metric="encoded_bytes")
+        compare_results(args.compare, results, metric="p50_ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# bench/bench_hot_path.py
+"""Бенчмарк горячего пути чата и функций работы с файлами.
+
+Гоняет Flask test client по /chat, /ask, /suggestion-answer, /menu-items и
+/booking на синтетических данных (1k/10k/100k вопросов в базе знаний,
+10k/1M записей в bot_log.json) и отдельно замеряет log_interaction,
+load_menu, load_knowledge_base и конвертеры. Yandex GPT заменяется
+локальной заглушкой с настраиваемой задержкой. Пример:
+
+    python bench/bench_hot_path.py --quick --json before.json
+    python bench/bench_hot_path.py --quick --compare before.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchlib import add_repo_to_path, compare_results, print_table, summarize, write_results
+
+add_repo_to_path()
+
+TOPICS = ["vr", "батуты", "нерф", "день рождения", "выпускные", "default"]
+
+def kb_question(i):
+    return f"вопрос про аттракцион номер {i}"
+
+def build_dataset(path, kb_size, log_size, seed=42):
+    """Создаёт каталог с синтетическими JSON-файлами в формате приложения"""
+    rnd = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+
+    knowledge = {
+        kb_question(i): f"🎯 Ответ {i}: " + "подробное описание услуги и цен. " * rnd.randint(2, 8)
+        for i in range(kb_size)
+    }
+    suggestions = {
+        topic: [
+            {"text": f"Подсказка {j}", "question": f"{topic} вопрос {j}", "answer": f"Ответ на {topic} {j} 🎉"}
+            for j in range(6)
+        ]
+        for topic in TOPICS
+    }
+    menu = [
+        {"admin_text": f"Кнопка {i}", "display_text": f"🎮 Кнопка {i}", "question": f"меню {i}",
+         "category": "attractions", "price_info": "", "suggestion_topic": TOPICS[i % len(TOPICS)]}
+        for i in range(12)
+    ]
+    sources = ["knowledge_base", "yandex_gpt"]
+    logs = [
+        {"timestamp": f"2025-08-{1 + i % 28:02d}T12:00:00", "question": kb_question(rnd.randrange(max(kb_size, 1))),
+         "answer": "ответ " * rnd.randint(5, 40), "source": sources[i % 2]}
+        for i in range(log_size)
+    ]
+
+    files = {
+        "knowledge_base.json": knowledge,
+        "suggestions.json": suggestions,
+        "menu.json": menu,
+        "bot_log.json": logs,
+        "bookings.json": [],
+    }
+    for name, data in files.items():
+        with open(os.path.join(path, name), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+
+def gpt_stub_factory(latency_ms):
+    """Заглушка вместо call_yandex_gpt с фиксированной задержкой"""
+    def call_yandex_gpt_stub(prompt, history=None, **kwargs):
+        if latency_ms:
+            time.sleep(latency_ms / 1000.0)
+        return f"🤖 Заглушка GPT: ответ на «{prompt[:40]}»"
+    return call_yandex_gpt_stub
+
+def measure(fn, iterations, max_seconds, setup=None):
+    """Вызывает fn до iterations раз или пока не исчерпан бюджет времени"""
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    started = time.perf_counter()
+    for i in range(iterations):
+        if setup:
+            setup(i)
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - t0) * 1000)
+        if time.perf_counter() > deadline:
+            break
+    return summarize(samples, time.perf_counter() - started)
+
+def activate_dataset(web_app, path):
+    """Переключает приложение на каталог с данными и перезагружает их"""
+    os.chdir(path)
+    web_app._data_loaded = False
+    web_app.MENU_CACHE = None
+    web_app.ensure_data_loaded()
+
+def http_cases(web_app, client, kb_size):
+    """Сценарии HTTP-эндпоинтов: имя → функция(i)"""
+    last_topic = TOPICS[-1]
+
+    def post_json(url, payload):
+        response = client.post(url, json=payload)
+        assert response.status_code < 500, (url, response.status_code)
+
+    return {
+        "chat:knowledge_base": lambda i: post_json("/chat", {"message": kb_question(i % kb_size)}),
+        "chat:suggestion_map": lambda i: post_json("/chat", {"message": f"{last_topic} вопрос {i % 6}"}),
+        "chat:gpt_stub": lambda i: post_json("/chat", {"message": f"неизвестный вопрос {i}"}),
+        "ask:knowledge_base": lambda i: post_json("/ask", {"question": kb_question(i % kb_size)}),
+        "ask:gpt_stub": lambda i: post_json("/ask", {"question": f"неизвестный вопрос {i}"}),
+        "suggestion-answer": lambda i: post_json("/suggestion-answer", {"question": f"{last_topic} вопрос {i % 6}"}),
+        "menu-items": lambda i: client.get("/menu-items"),
+        "booking": lambda i: client.post("/booking", data={
+            "name": f"Гость {i}", "phone": "9000000000", "date": "2025-09-01",
+            "guests": "10", "event_type": "День рождения"}),
+    }
+
+def micro_cases(web_app, data_dir):
+    """Микробенчмарки функций: имя → (функция(i), setup(i) или None)"""
+    import csv_to_json
+    import json_to_csv
+
+    csv_path = os.path.join(data_dir, "knowledge_edit.csv")
+    json_to_csv.json_to_csv("knowledge_base.json", csv_path)
+
+    def reset_menu_cache(_i):
+        web_app.MENU_CACHE = None
+
+    cases = {
+        "log_interaction": (lambda i: web_app.log_interaction(f"вопрос {i}", "ответ", "knowledge_base"), None),
+        "load_menu:cold": (lambda i: web_app.load_menu(), reset_menu_cache),
+        "load_menu:cached": (lambda i: web_app.load_menu(), None),
+        "load_knowledge_base": (lambda i: web_app.load_knowledge_base(), None),
+        "convert:json_to_csv": (lambda i: json_to_csv.json_to_csv("knowledge_base.json", csv_path), None),
+        "convert:csv_to_dict": (lambda i: csv_to_json.parse_csv_to_dict(csv_path), None),
+    }
+
+    try:
+        import pandas  # noqa: F401 — конвертер Excel нужен только при наличии pandas
+        import excel_to_json
+        xlsx_path = os.path.join(data_dir, "knowledge.xlsx")
+        pandas.DataFrame(
+            [{"key (вопрос)": k, "value (ответ)": v} for k, v in web_app.KNOWLEDGE_BASE.items()]
+        ).to_excel(xlsx_path, index=False)
+        out_path = os.path.join(data_dir, "from_excel.json")
+        cases["convert:excel_to_json"] = (lambda i: excel_to_json.process_excel_to_json(xlsx_path, out_path), None)
+    except ImportError:
+        print("ℹ️ pandas не установлен — convert:excel_to_json пропущен")
+
+    return cases
+
+def parse_sizes(value):
+    return [int(float(v.replace("k", "e3").replace("M", "e6"))) for v in value.split(",") if v]
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк горячего пути чата и функций хранения")
+    parser.add_argument("--kb-sizes", default="1k,10k,100k", help="Размеры базы знаний")
+    parser.add_argument("--log-sizes", default="10k,1M", help="Размеры bot_log.json")
+    parser.add_argument("--iterations", type=int, default=200, help="Максимум итераций на сценарий")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="Бюджет времени на сценарий")
+    parser.add_argument("--gpt-latency-ms", type=float, default=0.0, help="Задержка заглушки GPT")
+    parser.add_argument("--gpt-stub-url", help="Ходить в запущенный yandex_gpt_stub.py вместо заглушки в процессе")
+    parser.add_argument("--only", help="Запускать только сценарии, содержащие подстроку")
+    parser.add_argument("--quick", action="store_true", help="Быстрый прогон: 1k вопросов, 10k логов")
+    parser.add_argument("--keep-data", help="Каталог для синтетических данных (не удалять)")
+    parser.add_argument("--json", help="Сохранить результаты в JSON")
+    parser.add_argument("--compare", help="Сравнить с сохранённым JSON")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.kb_sizes, args.log_sizes, args.iterations = "1k", "10k", min(args.iterations, 50)
+
+    kb_sizes = parse_sizes(args.kb_sizes)
+    log_sizes = parse_sizes(args.log_sizes)
+    # Размер базы знаний и размер лога влияют на разные пути — не перемножаем их
+    datasets = [(kb, log_sizes[0]) for kb in kb_sizes] + [(kb_sizes[0], log) for log in log_sizes[1:]]
+
+    root = args.keep_data or tempfile.mkdtemp(prefix="dspace_bench_")
+    repo_cwd = os.getcwd()
+    # web_app пишет audit.log и файлы данных в текущий каталог — уводим их из репозитория
+    os.makedirs(root, exist_ok=True)
+    os.chdir(root)
+    os.environ.setdefault("SNAPSHOT_AUTO_REBUILD", "false")
+    if args.gpt_stub_url:
+        os.environ["YANDEX_GPT_BASE_URL"] = args.gpt_stub_url
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import web_app
+    if not args.gpt_stub_url:
+        web_app.call_yandex_gpt = gpt_stub_factory(args.gpt_latency_ms)
+    client = web_app.app.test_client()
+
+    results = {}
+    try:
+        for kb_size, log_size in datasets:
+            label = f"kb={kb_size},log={log_size}"
+            data_dir = os.path.join(root, label.replace(",", "_").replace("=", ""))
+            print(f"🧪 Набор данных {label}: генерация...", flush=True)
+            build_dataset(data_dir, kb_size, log_size)
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                activate_dataset(web_app, data_dir)
+                cases = {name: (fn, None) for name, fn in http_cases(web_app, client, kb_size).items()}
+                cases.update(micro_cases(web_app, data_dir))
+
+            for name, (fn, setup) in cases.items():
+                full_name = f"{name} [{label}]"
+                if args.only and args.only not in full_name:
+                    continue
+                print(f"  ▶ {full_name}", flush=True)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[full_name] = measure(fn, args.iterations, args.max_seconds, setup)
+    finally:
+        os.chdir(repo_cwd)
+        if not args.keep_data:
+            shutil.rmtree(root, ignore_errors=True)
+
+    print()
+    print_table(results)
+    if args.json:
+        write_results(args.json, "hot_path", results)
+    if args.compare:
+        compare_results(args.compare, results)
+
+if __name__ == "__main__":
+    main()
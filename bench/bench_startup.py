@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# bench/bench_startup.py
+"""Бенчмарк холодного старта на основе `python -X importtime`.
+
+Запускает импорт каждого модуля в отдельном процессе, разбирает вывод
+importtime и сохраняет медиану кумулятивного времени импорта. Пример:
+
+    python bench/bench_startup.py --repeat 10 --json startup.json
+    python bench/bench_startup.py --compare startup.json
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from benchlib import REPO_ROOT, compare_results, write_results
+
+DEFAULT_MODULES = [
+    "web_app",
+    "excel_to_json",
+    "csv_to_xlsx",
+    "split_to_excel",
+    "csv_to_json",
+    "json_to_csv",
+]
+
+# Кроме импорта меряем первый запрос: туда переехала загрузка данных
+FIRST_REQUEST_CODE = "import web_app; web_app.app.test_client().get('/api/menu-display')"
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def parse_importtime(stderr):
+    """Разбирает вывод -X importtime в список (модуль, self_us, cumulative_us, глубина)"""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+def run_once(code):
+    """Один холодный запуск интерпретатора; возвращает (wall_ms, строки importtime)"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="")
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "ошибка запуска")
+    return wall_ms, parse_importtime(proc.stderr)
+
+def bench_target(name, code, module, repeat):
+    """Медианы по нескольким запускам + самые тяжёлые импорты"""
+    wall, cumulative = [], []
+    heaviest = {}
+    for _ in range(repeat):
+        wall_ms, rows = run_once(code)
+        wall.append(wall_ms)
+        own = [r for r in rows if r[0] == module]
+        cumulative.append(own[-1][2] / 1000 if own else 0.0)
+        for mod, _self_us, cum_us, depth in rows:
+            if depth == 1:
+                heaviest[mod] = max(heaviest.get(mod, 0), cum_us)
+
+    top = sorted(heaviest.items(), key=lambda kv: kv[1], reverse=True)[:5]
+    return {
+        "count": repeat,
+        "import_ms": round(statistics.median(cumulative), 3),
+        "wall_ms": round(statistics.median(wall), 3),
+        "p50_ms": round(statistics.median(cumulative), 3),
+        "top_imports": [{"module": m, "cumulative_ms": round(us / 1000, 3)} for m, us in top],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк времени импорта (-X importtime)")
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES),
+                        help="Модули через запятую")
+    parser.add_argument("--repeat", type=int, default=5, help="Количество запусков на модуль")
+    parser.add_argument("--no-first-request", action="store_true",
+                        help="Не замерять первый запрос к web_app")
+    parser.add_argument("--json", help="Сохранить результаты в JSON")
+    parser.add_argument("--compare", help="Сравнить с сохранённым JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for module in [m.strip() for m in args.modules.split(",") if m.strip()]:
+        try:
+            results[f"import:{module}"] = bench_target(module, f"import {module}", module, args.repeat)
+        except RuntimeError as e:
+            print(f"⚠️ {module}: {e}")
+
+    if not args.no_first_request and "web_app" in args.modules:
+        try:
+            results["first_request:web_app"] = bench_target(
+                "web_app", FIRST_REQUEST_CODE, "web_app", args.repeat)
+        except RuntimeError as e:
+            print(f"⚠️ первый запрос web_app: {e}")
+
+    print(f"\n⏱️ Холодный старт (медиана из {args.repeat} запусков):")
+    for name, row in results.items():
+        print(f"  {name:<30} импорт {row['import_ms']:>9.2f} мс   процесс {row['wall_ms']:>9.2f} мс")
+        for item in row["top_imports"][:3]:
+            print(f"      ↳ {item['module']:<26} {item['cumulative_ms']:>9.2f} мс")
+
+    if args.json:
+        write_results(args.json, "startup", results)
+    if args.compare:
+        compare_results(args.compare, results, metric="import_ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# bench/benchlib.py
+"""Общие функции для бенчмарков: статистика, сохранение и сравнение прогонов"""
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def add_repo_to_path():
+    """Делает модули проекта (web_app, utils, конвертеры) доступными для импорта"""
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+def percentile(sorted_values, p):
+    """Перцентиль по уже отсортированному списку (линейная интерполяция)"""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+def summarize(samples_ms, total_seconds=None):
+    """Сводка по замерам в миллисекундах: перцентили и пропускная способность"""
+    values = sorted(samples_ms)
+    summary = {
+        "count": len(values),
+        "min_ms": round(values[0], 4) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 4),
+        "p90_ms": round(percentile(values, 90), 4),
+        "p95_ms": round(percentile(values, 95), 4),
+        "p99_ms": round(percentile(values, 99), 4),
+        "max_ms": round(values[-1], 4) if values else 0.0,
+        "mean_ms": round(sum(values) / len(values), 4) if values else 0.0,
+    }
+    if total_seconds is None:
+        total_seconds = sum(values) / 1000.0
+    summary["throughput_rps"] = round(len(values) / total_seconds, 2) if total_seconds > 0 else 0.0
+    return summary
+
+def environment_info():
+    """Описание окружения, чтобы сравнивать прогоны с одной машины"""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+
+def write_results(path, suite, results):
+    """Сохраняет результаты прогона в JSON"""
+    payload = {"suite": suite, "environment": environment_info(), "results": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    print(f"💾 Результаты сохранены: {path}")
+
+def compare_results(baseline_path, results, metric="p50_ms"):
+    """Печатает изменение метрики относительно сохранённого прогона"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f).get("results", {})
+
+    print(f"\n📊 Сравнение с {baseline_path} ({metric}):")
+    for name, current in results.items():
+        old = baseline.get(name, {}).get(metric)
+        new = current.get(metric)
+        if old is None or new is None:
+            print(f"  {name:<45} {'—':>12} → {new if new is not None else '—':>12}")
+            continue
+        delta = (new - old) / old * 100 if old else 0.0
+        print(f"  {name:<45} {old:>12.3f} → {new:>12.3f}  ({delta:+.1f}%)")
+
+def print_table(results, columns=("count", "p50_ms", "p95_ms", "p99_ms", "throughput_rps")):
+    """Печатает результаты в виде таблицы"""
+    header = f"  {'бенчмарк':<45}" + "".join(f"{c:>16}" for c in columns)
+    print(header)
+    print("  " + "-" * (len(header) - 2))
+    for name, row in results.items():
+        print(f"  {name:<45}" + "".join(f"{row.get(c, ''):>16}" for c in columns))
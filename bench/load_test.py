@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# bench/load_test.py
+"""Нагрузочный тест: воспроизводит реалистичные сессии посетителей против запущенного сервера.
+
+Вопросы выбираются с частотами из bot_log.json. Сессия посетителя повторяет
+страницу чата: открыть страницу и загрузить /api/bootstrap (вернувшийся
+посетитель шлёт If-None-Match и получает 304), затем несколько действий —
+клик по кнопке меню, нажатие подсказки, свободный вопрос, оценка ответа,
+изредка бронирование. Страница также хранит /api/knowledge-export (тоже
+с If-None-Match) и отвечает на вопрос, совпавший с известным после
+нормализации, без запроса. Кнопки меню и подсказки с готовым ответом и
+такие вопросы, как и на странице, отвечаются без запроса к серверу: они
+считаются отдельно и в RPS не входят. Нагрузка наращивается ступенями, по каждой ступени и
+каждому эндпоинту печатаются RPS, перцентили и доля ошибок.
+
+ВНИМАНИЕ: тест пишет в bot_log.json, feedback.json и bookings.json сервера —
+запускайте его на тестовом стенде, а GPT направляйте на yandex_gpt_stub.py.
+
+    python bench/load_test.py --url http://127.0.0.1:5000 --stages 5:30,20:60,50:60
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+import requests
+
+from benchlib import REPO_ROOT, add_repo_to_path, compare_results, summarize, write_results
+
+add_repo_to_path()
+from utils.normalize import normalize_question  # noqa: E402 — та же нормализация, что в offline_answers.js
+
+# Веса действий внутри сессии
+DEFAULT_MIX = {"menu": 4, "suggestion": 3, "free_text": 3, "feedback": 1, "booking": 0.2}
+
+class Stats:
+    """Потокобезопасный сбор замеров: (ступень, эндпоинт) → задержки и ошибки"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.local = Counter()        # (ступень, действие) → ответы без запроса к серверу
+        self.stage_seconds = {}
+
+    def record(self, stage, endpoint, latency_ms, ok):
+        with self.lock:
+            self.latencies[(stage, endpoint)].append(latency_ms)
+            if not ok:
+                self.errors[(stage, endpoint)] += 1
+
+    def record_local(self, stage, action):
+        with self.lock:
+            self.local[(stage, action)] += 1
+
+    def report(self):
+        results = {}
+        for (stage, endpoint), samples in sorted(self.latencies.items()):
+            summary = summarize(samples, self.stage_seconds.get(stage))
+            summary["errors"] = self.errors[(stage, endpoint)]
+            summary["error_rate"] = round(summary["errors"] / len(samples), 4) if samples else 0.0
+            results[f"{stage} {endpoint}"] = summary
+        return results
+
+def load_question_distribution(log_path):
+    """Частоты вопросов посетителей из bot_log.json"""
+    with open(log_path, "r", encoding="utf-8") as f:
+        logs = json.load(f)
+    counter = Counter(entry["question"] for entry in logs if entry.get("question"))
+    questions = list(counter)
+    weights = [counter[q] for q in questions]
+    return questions, weights
+
+class VirtualUser(threading.Thread):
+    """Один посетитель: крутит сессии, пока его не остановят"""
+
+    def __init__(self, base_url, scenario, stats, stage_ref, stop_event, think_ms, seed, returning=0.5):
+        super().__init__(daemon=True)
+        self.base_url = base_url.rstrip("/")
+        self.scenario = scenario
+        self.stats = stats
+        self.stage_ref = stage_ref
+        self.stop_event = stop_event
+        self.think_ms = think_ms
+        self.rnd = random.Random(seed)
+        self.http = requests.Session()
+        # Доля сессий вернувшегося посетителя: данные страницы уже лежат в localStorage
+        self.returning = returning
+        self.bootstrap = None
+        self.knowledge = None         # {"version": ..., "answers": {нормализованный вопрос: ответ}}
+
+    def call(self, label, method, path, **kwargs):
+        started = time.perf_counter()
+        ok, response = True, None
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=60, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        self.stats.record(self.stage_ref[0], label, (time.perf_counter() - started) * 1000, ok)
+        return response if ok else None
+
+    def think(self):
+        if self.think_ms:
+            self.stop_event.wait(self.rnd.expovariate(1.0 / self.think_ms) / 1000.0)
+
+    def json_or(self, response, default):
+        try:
+            return response.json() if response is not None else default
+        except ValueError:
+            return default
+
+    def load_bootstrap(self):
+        """Как static/js/bootstrap.js: сохранённая копия и проверка версии через If-None-Match"""
+        headers = {}
+        if self.bootstrap and self.bootstrap.get("version"):
+            headers["If-None-Match"] = f'"{self.bootstrap["version"]}"'
+        response = self.call("GET /api/bootstrap", "GET", "/api/bootstrap", headers=headers)
+        if response is not None and response.status_code == 200:
+            self.bootstrap = self.json_or(response, None)
+        return self.bootstrap or {}
+
+    def load_knowledge(self):
+        """Как static/js/offline_answers.js: копия в IndexedDB и проверка версии через If-None-Match"""
+        headers = {}
+        if self.knowledge and self.knowledge.get("version"):
+            headers["If-None-Match"] = f'"{self.knowledge["version"]}"'
+        response = self.call("GET /api/knowledge-export", "GET", "/api/knowledge-export", headers=headers)
+        if response is not None and response.status_code == 200:
+            data = self.json_or(response, {})
+            # Нормализованный вопрос → (ответ, тема подсказок)
+            answers = {normalize_question(q): (a, None) for q, a in (data.get("knowledge_base") or {}).items()}
+            for item in data.get("suggestions") or []:
+                answers[normalize_question(item.get("question"))] = (item.get("answer"), item.get("topic"))
+            answers.pop("", None)
+            self.knowledge = {"version": data.get("version"), "answers": answers}
+
+    def topic_suggestions(self, bootstrap, topic):
+        suggestions = bootstrap.get("suggestions") or {}
+        return suggestions.get((topic or "").lower()) or suggestions.get("default", [])
+
+    def detect_topic(self, bootstrap, answer):
+        """Как detectTopic на странице чата: первая тема, упомянутая в ответе"""
+        text = (answer or "").lower()
+        return next((topic for topic in bootstrap.get("suggestions") or {}
+                     if topic != "default" and topic in text), None)
+
+    def answer_locally(self, action):
+        self.stats.record_local(self.stage_ref[0], action)
+
+    def ask(self, question):
+        """Вопрос на сервер, если его нет в сохранённой базе; возвращает новые подсказки"""
+        known = self.knowledge and self.knowledge["answers"].get(normalize_question(question))
+        if known and known[0]:
+            self.answer_locally("known_question")
+            # Страница показывает подсказки темы из bootstrap и без запроса к серверу
+            answer, topic = known
+            bootstrap = self.bootstrap or {}
+            return self.topic_suggestions(bootstrap, topic or self.detect_topic(bootstrap, answer))
+        # Как страница чата (templates/index.html): похожие вопросы приходят с ответами
+        data = self.json_or(self.call("POST /ask", "POST", "/ask",
+                                      json={"question": question, "inline_answers": True}), {})
+        return data.get("suggestions")
+
+    def session(self):
+        # Новый посетитель приходит с пустыми localStorage и IndexedDB
+        if self.rnd.random() >= self.returning:
+            self.bootstrap = self.knowledge = None
+        self.call("GET /", "GET", "/")
+        bootstrap = self.load_bootstrap()
+        self.load_knowledge()
+        menu = bootstrap.get("menu", [])
+        suggestions = []
+        last_question = None
+
+        for _ in range(self.rnd.randint(2, 8)):
+            if self.stop_event.is_set():
+                return
+            self.think()
+            action = self.rnd.choices(self.scenario["actions"], self.scenario["action_weights"])[0]
+
+            if action == "menu" and menu:
+                item = self.rnd.choice(menu)
+                last_question = item.get("question", "")
+                if item.get("answer"):
+                    self.answer_locally("menu")
+                else:
+                    self.ask(last_question)
+                # Подсказки темы берутся из bootstrap, без /suggestions/<topic>
+                suggestions = self.topic_suggestions(bootstrap, item.get("suggestion_topic"))
+            elif action == "suggestion" and suggestions:
+                chip = self.rnd.choice(suggestions)
+                last_question = chip.get("question", "")
+                if chip.get("answer"):
+                    self.answer_locally("suggestion")
+                else:
+                    suggestions = self.ask(last_question) or suggestions
+            elif action == "feedback" and last_question:
+                self.call("POST /feedback", "POST", "/feedback",
+                          json={"question": last_question, "feedback": self.rnd.choice(["good", "good", "bad"])})
+            elif action == "booking":
+                self.call("POST /booking", "POST", "/booking", data={
+                    "name": "Нагрузочный тест", "phone": "9000000000", "date": "2025-12-30",
+                    "guests": str(self.rnd.randint(5, 30)), "event_type": "День рождения"})
+            else:
+                last_question = self.rnd.choices(self.scenario["questions"], self.scenario["question_weights"])[0]
+                suggestions = self.ask(last_question) or suggestions
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.session()
+
+def parse_stages(value):
+    """'10:30,50:60' → [(10 пользователей, 30 с), (50, 60)]"""
+    stages = []
+    for part in value.split(","):
+        users, seconds = part.split(":")
+        stages.append((int(users), float(seconds)))
+    return stages
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест с реалистичными сессиями посетителей")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Адрес запущенного сервера")
+    parser.add_argument("--stages", default="5:30,20:30,50:30", help="Ступени 'пользователи:секунды' через запятую")
+    parser.add_argument("--log", default=os.path.join(REPO_ROOT, "bot_log.json"), help="Источник частот вопросов")
+    parser.add_argument("--think-ms", type=float, default=1000.0, help="Средняя пауза между действиями")
+    parser.add_argument("--returning", type=float, default=0.5,
+                        help="Доля сессий вернувшихся посетителей (данные страницы уже в браузере)")
+    parser.add_argument("--mix", default=json.dumps(DEFAULT_MIX), help="Веса действий в JSON")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Сохранить результаты в JSON")
+    parser.add_argument("--compare", help="Сравнить с сохранённым JSON")
+    args = parser.parse_args()
+
+    questions, question_weights = load_question_distribution(args.log)
+    mix = json.loads(args.mix)
+    scenario = {
+        "questions": questions,
+        "question_weights": question_weights,
+        "actions": list(mix),
+        "action_weights": list(mix.values()),
+    }
+    print(f"📚 {len(questions)} уникальных вопросов из {args.log}")
+
+    stats = Stats()
+    stage_ref = ["warmup"]
+    users = []
+
+    for number, (target, seconds) in enumerate(parse_stages(args.stages), start=1):
+        stage_name = f"stage{number}:{target}u"
+        stage_ref[0] = stage_name
+        # Добавляем или останавливаем пользователей до целевого числа
+        while len(users) < target:
+            stop = threading.Event()
+            vu = VirtualUser(args.url, scenario, stats, stage_ref, stop, args.think_ms, args.seed + len(users),
+                             args.returning)
+            users.append((vu, stop))
+            vu.start()
+        while len(users) > target:
+            users.pop()[1].set()
+
+        print(f"🚀 {stage_name}: {target} пользователей на {seconds:.0f} с", flush=True)
+        started = time.perf_counter()
+        time.sleep(seconds)
+        stats.stage_seconds[stage_name] = time.perf_counter() - started
+
+    for _, stop in users:
+        stop.set()
+
+    results = stats.report()
+    print(f"\n  {'ступень / эндпоинт':<48}{'запросов':>10}{'RPS':>10}{'p50 мс':>10}{'p95 мс':>10}{'p99 мс':>10}{'ошибки':>9}")
+    for name, row in results.items():
+        print(f"  {name:<48}{row['count']:>10}{row['throughput_rps']:>10}{row['p50_ms']:>10.1f}"
+              f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['error_rate'] * 100:>8.1f}%")
+
+    if stats.local:
+        print("\n  Ответы без запроса к серверу (данные уже на странице):")
+        for (stage, action), count in sorted(stats.local.items()):
+            print(f"  {stage + ' ' + action:<48}{count:>10}")
+
+    if args.json:
+        write_results(args.json, "load_test", results)
+    if args.compare:
+        compare_results(args.compare, results, metric="p95_ms")
+
+if __name__ == "__main__":
+    main()
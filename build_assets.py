@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# build_assets.py
+"""Сборка статики: имена с хэшем содержимого, gzip/brotli-варианты и манифест для asset_url()"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+from utils.assets import DIST_DIR, MANIFEST_NAME
+
+# Какие файлы собирать и какие из них имеет смысл сжимать
+ASSET_EXTENSIONS = {".css", ".js", ".svg", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ico", ".woff", ".woff2"}
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".svg"}
+
+def find_assets(static_dir):
+    """Исходные файлы статики (без dist/ и резервных копий)"""
+    for root, dirs, files in os.walk(static_dir):
+        if os.path.abspath(root) == os.path.abspath(static_dir):
+            dirs[:] = [d for d in dirs if d != DIST_DIR]
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in ASSET_EXTENSIONS and "копия" not in name:
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, static_dir).replace(os.sep, "/")
+
+def write_compressed(path, data):
+    """Пишет .gz и .br рядом с файлом, если они меньше оригинала; возвращает размеры"""
+    sizes = {}
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        with open(path + ".gz", "wb") as f:
+            f.write(gz)
+        sizes["gzip"] = len(gz)
+    try:
+        import brotli
+    except ImportError:
+        return sizes
+    br = brotli.compress(data, quality=11)
+    if len(br) < len(data):
+        with open(path + ".br", "wb") as f:
+            f.write(br)
+        sizes["br"] = len(br)
+    return sizes
+
+def build(static_dir):
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    # Пересобираем с нуля, чтобы не копить старые версии файлов
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    os.makedirs(dist_dir)
+
+    manifest = {}
+    for rel_path in find_assets(static_dir):
+        with open(os.path.join(static_dir, rel_path), "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, ext = os.path.splitext(rel_path)
+        hashed = f"{stem}.{digest}{ext}"
+        out_path = os.path.join(dist_dir, hashed)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, "wb") as f:
+            f.write(data)
+        manifest[rel_path] = hashed
+
+        sizes = write_compressed(out_path, data) if ext.lower() in COMPRESSIBLE_EXTENSIONS else {}
+        variants = ", ".join(f"{name} {size}" for name, size in sizes.items())
+        print(f"- {rel_path} → {hashed} ({len(data)} байт{'; ' + variants if variants else ''})")
+
+    with open(os.path.join(dist_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description='Сборка статики с хэшами в именах и сжатыми вариантами')
+    parser.add_argument('--static-dir', default='static', help='Каталог статики')
+    args = parser.parse_args()
+
+    manifest = build(args.static_dir)
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        print("ℹ️ Пакет brotli не установлен — собраны только .gz варианты")
+    print(f"📦 {len(manifest)} файлов в {os.path.join(args.static_dir, DIST_DIR)}")
+
+if __name__ == "__main__":
+    main()
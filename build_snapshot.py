@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# build_snapshot.py
+"""Сборка бинарного снимка данных (knowledge_base + suggestions + menu + индекс справки) для быстрого старта"""
+import argparse
+import os
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description='Сборка бинарного снимка данных бота')
+    parser.add_argument('--output', help='Путь к файлу снимка (по умолчанию SNAPSHOT_FILE)')
+    args = parser.parse_args()
+
+    import web_app
+
+    if args.output:
+        web_app.SNAPSHOT_FILE = args.output
+
+    started = time.perf_counter()
+    # Всегда читаем исходные JSON, а не старый снимок
+    web_app.load_knowledge_base()
+    web_app.load_suggestion_map()
+    web_app.MENU_CACHE = None
+    web_app.load_menu()
+
+    if not web_app.save_snapshot():
+        exit(1)
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"📦 {web_app.SNAPSHOT_FILE}: {os.path.getsize(web_app.SNAPSHOT_FILE)} байт за {elapsed_ms:.1f} мс")
+    print(f"- Вопросов в базе знаний: {len(web_app.KNOWLEDGE_BASE)}")
+    print(f"- Тем подсказок: {len(web_app.suggestionMap)}")
+    print(f"- Кнопок меню: {len(web_app.MENU_CACHE or [])}")
+    print(f"- Записей в индексе справки для GPT: {len(web_app.retrieval_index().entries)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# config.py
+"""Профили конфигурации приложения: APP_ENV=development (по умолчанию) или production"""
+import os
+
+from dotenv import load_dotenv
+
+# Переменные из .env должны быть видны до вычисления настроек ниже
+load_dotenv()
+
+class Config:
+    """Общие настройки"""
+    SECRET_KEY = os.getenv("FLASK_SECRET_KEY", "super-secret-key-for-d-space-bot")
+    # Файлы без хэша в имени (не из static/dist) всегда перепроверяются браузером
+    SEND_FILE_MAX_AGE_DEFAULT = 0
+    TEMPLATES_AUTO_RELOAD = True
+    # Каталог байткода Jinja; None — шаблоны компилируются заново в каждом процессе
+    JINJA_BYTECODE_CACHE_DIR = None
+
+class DevelopmentConfig(Config):
+    """Разработка: правки шаблонов видны без перезапуска"""
+
+class ProductionConfig(Config):
+    """Продакшен: шаблоны не перечитываются с диска, байткод берётся из кэша"""
+    TEMPLATES_AUTO_RELOAD = False
+    JINJA_BYTECODE_CACHE_DIR = os.getenv("JINJA_BYTECODE_CACHE_DIR", ".jinja_cache")
+
+PROFILES = {
+    "development": DevelopmentConfig,
+    "production": ProductionConfig
+}
+
+def get_config(name=None):
+    """Класс настроек по имени профиля или переменной APP_ENV"""
+    name = (name or os.getenv("APP_ENV", "development")).strip().lower()
+    if name not in PROFILES:
+        raise ValueError(f"Неизвестный профиль APP_ENV={name!r}, доступны: {', '.join(PROFILES)}")
+    return PROFILES[name]
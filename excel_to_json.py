@@ -1,12 +1,12 @@
 # excel_to_json.py
-import pandas as pd
 import json
 import os
 import re
 
 def clean_text(text):
     """Очистка текста от лишних пробелов и специальных символов"""
-    if pd.isna(text) or text == 'None':
+    # text != text — проверка на NaN без импорта pandas
+    if text is None or text != text or text == 'None':
         return ""
     text = str(text).strip()
     # Заменяем множественные переносы строк на одинарные
@@ -17,6 +17,8 @@ def clean_text(text):
 
 def process_excel_to_json(file_path, output_file):
     try:
+        import pandas as pd  # ленивый импорт: pandas/openpyxl нужны только здесь
+
         # Чтение Excel файла
         df = pd.read_excel(
             file_path,
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# precompile_templates.py
+"""Компиляция шаблонов templates/ и templates/admin/ в кэш байткода Jinja при сборке"""
+import argparse
+import os
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description='Предварительная компиляция шаблонов Jinja')
+    parser.add_argument('--profile', default='production', help='Профиль настроек (APP_ENV)')
+    parser.add_argument('--strict', action='store_true', help='Завершаться с ошибкой, если шаблон не компилируется')
+    args = parser.parse_args()
+
+    # Профиль нужно выбрать до импорта приложения
+    os.environ["APP_ENV"] = args.profile
+    import web_app
+    from utils.template_cache import precompile
+
+    cache_dir = web_app.app.config.get("JINJA_BYTECODE_CACHE_DIR")
+    if not cache_dir:
+        print(f"❌ В профиле {args.profile} кэш байткода не настроен (JINJA_BYTECODE_CACHE_DIR)")
+        exit(1)
+
+    env = web_app.app.jinja_env
+    names = [name for name in env.list_templates(extensions=["html"])
+             if "/" not in name or (name.startswith("admin/") and name.count("/") == 1)]
+
+    started = time.perf_counter()
+    errors = precompile(env, names)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    for name, error in errors.items():
+        print(f"⚠️ {name}: {error}")
+    print(f"📦 Скомпилировано шаблонов: {len(names) - len(errors)} из {len(names)} за {elapsed_ms:.1f} мс → {cache_dir}")
+    if errors and args.strict:
+        exit(1)
+
+if __name__ == "__main__":
+    main()
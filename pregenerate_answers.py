@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# pregenerate_answers.py
+"""Заранее готовит ответы на частые вопросы, которые уходят в GPT.
+
+Ищет в bot_log.json вопросы с источником yandex_gpt, которые задавали не
+реже --min-count раз и на которые до сих пор нет ответа в базе знаний или
+подсказках. Для самых частых из них вызывает GPT (не больше --concurrency
+запросов одновременно) и пишет ответы в answer_candidates.json со статусом
+pending. Администратор проверяет их на /admin/candidates и переносит в
+базу знаний пачкой. Для проверки без настоящего GPT задайте
+YANDEX_GPT_BASE_URL=http://127.0.0.1:8081 и запустите yandex_gpt_stub.py.
+
+    python pregenerate_answers.py --min-count 3 --limit 30
+    python pregenerate_answers.py --dry-run
+"""
+import argparse
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+def frequent_gpt_questions(logs, min_count):
+    """(нормализованный вопрос, вопрос, сколько раз, когда последний) по убыванию частоты"""
+    from utils.normalize import normalize_question
+
+    counts = Counter()
+    examples = {}
+    last_seen = {}
+    for entry in logs:
+        if entry.get("source") != "yandex_gpt":
+            continue
+        question = (entry.get("question") or "").strip().lower()
+        key = normalize_question(question)
+        if not key:
+            continue
+        counts[key] += 1
+        examples.setdefault(key, question)
+        last_seen[key] = max(last_seen.get(key, ""), entry.get("timestamp", ""))
+    return [(key, examples[key], count, last_seen[key])
+            for key, count in counts.most_common() if count >= min_count]
+
+def main():
+    parser = argparse.ArgumentParser(description='Ответы GPT на частые вопросы для переноса в базу знаний')
+    parser.add_argument('--log', default='bot_log.json', help='Журнал диалогов')
+    parser.add_argument('--output', help='Файл кандидатов (по умолчанию CANDIDATES_FILE)')
+    parser.add_argument('--min-count', type=int, default=3, help='Сколько раз вопрос должен встретиться')
+    parser.add_argument('--limit', type=int, default=50, help='Сколько вопросов обработать за запуск')
+    parser.add_argument('--concurrency', type=int, default=4, help='Одновременных запросов к GPT')
+    parser.add_argument('--dry-run', action='store_true', help='Только показать вопросы, без вызовов GPT')
+    args = parser.parse_args()
+
+    import web_app
+    from utils.normalize import normalize_question
+
+    if args.output:
+        web_app.CANDIDATES_FILE = args.output
+    web_app.ensure_data_loaded()
+
+    with open(args.log, "r", encoding="utf-8") as f:
+        content = f.read().strip()
+    logs = json.loads(content) if content else []
+
+    candidates = web_app.load_answer_candidates()
+    known = {normalize_question(c["question"]) for c in candidates}
+    todo = []
+    for key, question, count, last_seen in frequent_gpt_questions(logs, args.min_count):
+        # Уже есть в очереди (в том числе отклонённые) или уже отвечается без GPT
+        if key in known or web_app.knowledge_lookup(question) or key in web_app.SUGGESTION_INDEX:
+            continue
+        todo.append((question, count, last_seen))
+    todo = todo[:args.limit]
+
+    print(f"🔎 Частых вопросов без готового ответа: {len(todo)}")
+    for question, count, _ in todo:
+        print(f"- {count:>4} × {question}")
+    if args.dry_run or not todo:
+        return
+
+    def generate(question):
+        started = time.perf_counter()
+        try:
+            answer = web_app.call_yandex_gpt(question)
+        except web_app.GPTUnavailableError as e:
+            return None, f"GPT недоступен ({e.reason})", time.perf_counter() - started
+        if answer.startswith("❌"):
+            return None, answer, time.perf_counter() - started
+        return answer, None, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        results = list(pool.map(generate, [question for question, _, _ in todo]))
+
+    added = 0
+    for (question, count, last_seen), (answer, error, elapsed) in zip(todo, results):
+        if answer is None:
+            print(f"⚠️ {question}: {error}")
+            continue
+        candidates.append({
+            "question": question,
+            "answer": answer,
+            "count": count,
+            "last_seen": last_seen,
+            "generated": datetime.now().isoformat(timespec="seconds"),
+            "status": "pending"
+        })
+        added += 1
+        print(f"✅ {question} ({elapsed * 1000:.0f} мс)")
+
+    web_app.save_answer_candidates(candidates)
+    print(f"📦 {added} новых кандидатов за {time.perf_counter() - started:.1f} с → {web_app.CANDIDATES_FILE}")
+
+if __name__ == "__main__":
+    main()
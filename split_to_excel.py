@@ -1,5 +1,4 @@
 # split_to_excel.py
-import pandas as pd
 
 # Исходный текст (можно загрузить из .txt)
 data = """
@@ -10,14 +9,22 @@ vr|🎮 VR-зоны
 нерф|🔫 Нерф-арена
 """
 
-# Разделяем строки и парсим
-rows = []
-for line in data.strip().split('\n'):
-    if '|' in line:
-        key, value = line.split('|', 1)  # 1 — только первое разделение
-        rows.append({"key (вопрос)": key.strip(), "value (ответ)": value.strip()})
+def parse_rows(text):
+    """Разделяет строки вида 'вопрос|ответ' на записи для Excel"""
+    rows = []
+    for line in text.strip().split('\n'):
+        if '|' in line:
+            key, value = line.split('|', 1)  # 1 — только первое разделение
+            rows.append({"key (вопрос)": key.strip(), "value (ответ)": value.strip()})
+    return rows
 
-# Сохраняем в Excel
-df = pd.DataFrame(rows)
-df.to_excel("knowledge_base.xlsx", index=False)
-print("✅ Готово! Файл сохранён как knowledge_base.xlsx")
\ No newline at end of file
+def main():
+    import pandas as pd  # ленивый импорт: pandas/openpyxl нужны только здесь
+
+    # Сохраняем в Excel
+    df = pd.DataFrame(parse_rows(data))
+    df.to_excel("knowledge_base.xlsx", index=False)
+    print("✅ Готово! Файл сохранён как knowledge_base.xlsx")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+// static/js/bootstrap.js
+// Данные для старта чата из /api/bootstrap: меню с готовыми ответами, категории и подсказки.
+// Хранятся в localStorage по версии: при повторном визите сервер отвечает 304 без тела,
+// а без сети используется сохранённая копия.
+
+const BOOTSTRAP_STORAGE_KEY = 'dspaceBootstrap';
+
+function readCachedBootstrap() {
+    try {
+        return JSON.parse(localStorage.getItem(BOOTSTRAP_STORAGE_KEY));
+    } catch (error) {
+        return null;
+    }
+}
+
+async function loadBootstrap() {
+    const cached = readCachedBootstrap();
+    const headers = {};
+    if (cached && cached.version) {
+        headers['If-None-Match'] = `"${cached.version}"`;
+    }
+
+    try {
+        const response = await fetch('/api/bootstrap', { headers });
+        if (response.status === 304 && cached) {
+            return cached;
+        }
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        const data = await response.json();
+        try {
+            localStorage.setItem(BOOTSTRAP_STORAGE_KEY, JSON.stringify(data));
+        } catch (error) {
+            console.warn('Не удалось сохранить данные чата:', error);
+        }
+        return data;
+    } catch (error) {
+        if (cached) {
+            return cached;
+        }
+        throw error;
+    }
+}
+
+// Подсказки темы (с ответами); для неизвестной темы — подсказки по умолчанию
+function bootstrapSuggestions(bootstrap, topic) {
+    const suggestions = (bootstrap && bootstrap.suggestions) || {};
+    const key = (topic || '').toLowerCase();
+    return suggestions[key] && suggestions[key].length ? suggestions[key] : (suggestions['default'] || []);
+}
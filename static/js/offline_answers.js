@@ -0,0 +1,94 @@
+// static/js/offline_answers.js
+// Ответы без сервера: база знаний и подсказки из /api/knowledge-export хранятся в IndexedDB.
+// При загрузке страницы копия сверяется с сервером по версии (If-None-Match → 304),
+// без сети используется сохранённая. Вопрос приводится к ключу так же, как
+// utils/normalize.py на сервере: меняете правила там — поменяйте и здесь.
+
+const OFFLINE_DB_NAME = 'dspace';
+const OFFLINE_STORE = 'knowledge';
+const OFFLINE_KEY = 'export';
+
+// Нормализованный вопрос → { answer, source, topic }
+let offlineAnswers = new Map();
+
+function normalizeQuestion(text) {
+    return (text || '').toLowerCase().replace(/ё/g, 'е').replace(/[^0-9a-zа-я]+/g, ' ').trim();
+}
+
+function openOfflineDb() {
+    return new Promise((resolve, reject) => {
+        if (!window.indexedDB) {
+            reject(new Error('IndexedDB недоступна'));
+            return;
+        }
+        const request = indexedDB.open(OFFLINE_DB_NAME, 1);
+        request.onupgradeneeded = () => request.result.createObjectStore(OFFLINE_STORE);
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+async function readOfflineSnapshot() {
+    try {
+        const db = await openOfflineDb();
+        return await new Promise((resolve, reject) => {
+            const request = db.transaction(OFFLINE_STORE, 'readonly').objectStore(OFFLINE_STORE).get(OFFLINE_KEY);
+            request.onsuccess = () => resolve(request.result || null);
+            request.onerror = () => reject(request.error);
+        });
+    } catch (error) {
+        return null;
+    }
+}
+
+async function writeOfflineSnapshot(snapshot) {
+    try {
+        const db = await openOfflineDb();
+        db.transaction(OFFLINE_STORE, 'readwrite').objectStore(OFFLINE_STORE).put(snapshot, OFFLINE_KEY);
+    } catch (error) {
+        console.warn('Не удалось сохранить базу ответов:', error);
+    }
+}
+
+// Тот же приоритет, что в /chat: подсказки важнее базы знаний
+function buildOfflineIndex(snapshot) {
+    const index = new Map();
+    Object.entries(snapshot.knowledge_base || {}).forEach(([question, answer]) => {
+        index.set(normalizeQuestion(question), { answer, source: 'knowledge_base', topic: null });
+    });
+    (snapshot.suggestions || []).forEach(item => {
+        index.set(normalizeQuestion(item.question), { answer: item.answer, source: 'suggestion_map', topic: item.topic });
+    });
+    index.delete('');
+    return index;
+}
+
+async function loadOfflineAnswers() {
+    const cached = await readOfflineSnapshot();
+    if (cached) {
+        offlineAnswers = buildOfflineIndex(cached);
+    }
+
+    const headers = {};
+    if (cached && cached.version) {
+        headers['If-None-Match'] = `"${cached.version}"`;
+    }
+    try {
+        const response = await fetch('/api/knowledge-export', { headers });
+        if (response.status === 304 || !response.ok) {
+            return offlineAnswers;
+        }
+        const snapshot = await response.json();
+        offlineAnswers = buildOfflineIndex(snapshot);
+        await writeOfflineSnapshot(snapshot);
+    } catch (error) {
+        // Без сети остаётся сохранённая копия
+        console.warn('База ответов не обновлена:', error);
+    }
+    return offlineAnswers;
+}
+
+// Готовый ответ на вопрос или null — тогда спрашиваем сервер
+function findOfflineAnswer(question) {
+    return offlineAnswers.get(normalizeQuestion(question)) || null;
+}
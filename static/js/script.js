@@ -6,74 +6,72 @@ document.addEventListener('DOMContentLoaded', function() {
     setupCalculator();
 });
 
-// Новая функция для загрузки меню с отображаемым текстом
+// Данные /api/bootstrap (static/js/bootstrap.js подключается перед этим файлом)
+let bootstrap = null;
+
+// Загрузка меню и подсказок одним запросом с кэшем по версии
 async function loadDisplayMenu() {
     try {
-        const response = await fetch('/api/menu-display');
-        const menuItems = await response.json();
-        
-        const menuContainer = document.getElementById('main-menu');
-        if (!menuContainer) return;
-        
-        menuContainer.innerHTML = '';
-        
-        menuItems.forEach(item => {
-            const button = document.createElement('button');
-            button.className = 'menu-btn';
-            button.textContent = item.text;
-            button.onclick = () => handleMenuButtonClick(item.question, item.suggestion_topic);
-            menuContainer.appendChild(button);
-        });
+        bootstrap = await loadBootstrap();
     } catch (error) {
         console.error('Ошибка загрузки меню:', error);
-        
-        // Fallback: попытка загрузить через старый endpoint
-        try {
-            const fallbackResponse = await fetch('/menu-items');
-            const fallbackMenu = await fallbackResponse.json();
-            
-            const menuContainer = document.getElementById('main-menu');
-            if (menuContainer) {
-                menuContainer.innerHTML = '';
-                fallbackMenu.forEach(item => {
-                    const button = document.createElement('button');
-                    button.className = 'menu-btn';
-                    button.textContent = item.text || item.admin_text || '';
-                    button.onclick = () => handleMenuButtonClick(item.question, item.suggestion_topic || 'default');
-                    menuContainer.appendChild(button);
-                });
-            }
-        } catch (fallbackError) {
-            console.error('Ошибка загрузки fallback меню:', fallbackError);
-        }
+        return;
     }
+    const menuContainer = document.getElementById('main-menu');
+    if (!menuContainer) return;
+
+    menuContainer.innerHTML = '';
+
+    bootstrap.menu.forEach(item => {
+        const button = document.createElement('button');
+        button.className = 'menu-btn';
+        button.textContent = item.text;
+        button.onclick = () => handleMenuButtonClick(item);
+        menuContainer.appendChild(button);
+    });
 }
 
-// Обработчик клика по кнопкам меню
-async function handleMenuButtonClick(question, suggestionTopic = null) {
-    // Отправляем основной вопрос
-    sendMessage(question);
-    
-    // Загружаем и показываем подсказки, если указана тема
-    if (suggestionTopic) {
-        const suggestions = await loadSuggestions(suggestionTopic);
-        displaySuggestions(suggestions);
+// Обработчик клика по кнопкам меню: готовый ответ показываем без запроса к серверу
+function handleMenuButtonClick(item) {
+    if (item.answer) {
+        answerLocally(item.question, item.answer, item.source);
+    } else {
+        sendMessage(item.question);
+    }
+
+    // Показываем подсказки, если указана тема
+    if (item.suggestion_topic) {
+        displaySuggestions(loadSuggestions(item.suggestion_topic));
     } else {
         // Если тема не указана, скрываем подсказки
         document.getElementById('suggestions').style.display = 'none';
     }
 }
 
-// Функция для загрузки подсказок по теме
-async function loadSuggestions(topic) {
-    try {
-        const response = await fetch(`/suggestions/${topic}`);
-        const data = await response.json();
-        return data.suggestions;
-    } catch (error) {
-        console.error('Ошибка загрузки подсказок:', error);
-        return [];
-    }
+function answerLocally(question, answer, source) {
+    addMessage(question, true);
+    addMessage(answer, false, source);
+    saveChatHistory();
+}
+
+// Подсказки по теме берутся из данных bootstrap
+function loadSuggestions(topic) {
+    return bootstrapSuggestions(bootstrap, topic);
+}
+
+// Кнопка подсказки: ответ уже есть на клиенте — сервер не нужен
+function createSuggestionButton(suggestion) {
+    const button = document.createElement('button');
+    button.className = 'suggestion-btn';
+    button.textContent = suggestion.text;
+    button.onclick = () => {
+        if (suggestion.answer) {
+            answerLocally(suggestion.question, suggestion.answer, 'suggestion_map');
+        } else {
+            sendMessage(suggestion.question);
+        }
+    };
+    return button;
 }
 
 // Функция для отображения подсказок
@@ -85,11 +83,7 @@ function displaySuggestions(suggestions) {
     
     if (suggestions && suggestions.length > 0) {
         suggestions.forEach(suggestion => {
-            const button = document.createElement('button');
-            button.className = 'suggestion-btn';
-            button.textContent = suggestion.text;
-            button.onclick = () => sendMessage(suggestion.question);
-            suggestionsContainer.appendChild(button);
+            suggestionsContainer.appendChild(createSuggestionButton(suggestion));
         });
         suggestionsContainer.style.display = 'flex';
     } else {
@@ -158,11 +152,11 @@ function setupFeedbackHandlers() {
     document.addEventListener('click', function(e) {
         if (e.target.classList.contains('feedback-btn')) {
             const messageElement = e.target.closest('.message');
-            const question = messageElement?.querySelector('.message-text')?.textContent;
-            const feedback = e.target.classList.contains('feedback-good') ? 1 : 0;
+            const question = messageElement?.dataset.question;
+            const feedback = e.target.classList.contains('feedback-good') ? 'good' : 'bad';
             
             if (question) {
-                submitFeedback(question, feedback);
+                submitFeedback(question, feedback, messageElement.dataset.answer);
                 
                 // Визуальный feedback
                 e.target.style.opacity = '0.5';
@@ -242,10 +236,19 @@ async function sendMessage(message = null) {
     }
 }
 
+// Последний вопрос посетителя: оценка ответа отправляется вместе с ним
+let lastUserQuestion = '';
+
 function addMessage(text, isUser = false, source = null) {
     const chatMessages = document.getElementById('chat-messages');
     const messageElement = document.createElement('div');
     messageElement.className = `message ${isUser ? 'user-message' : 'bot-message'}`;
+    if (isUser) {
+        lastUserQuestion = text;
+    } else {
+        messageElement.dataset.question = lastUserQuestion;
+        messageElement.dataset.answer = text;
+    }
     
     let messageHTML = `
         <div class="message-text">${formatMessage(text)}</div>
@@ -284,11 +287,7 @@ function showSuggestions(suggestions) {
     suggestionsContainer.innerHTML = '';
     
     suggestions.forEach(suggestion => {
-        const button = document.createElement('button');
-        button.className = 'suggestion-btn';
-        button.textContent = suggestion.text;
-        button.onclick = () => sendMessage(suggestion.question);
-        suggestionsContainer.appendChild(button);
+        suggestionsContainer.appendChild(createSuggestionButton(suggestion));
     });
     
     suggestionsContainer.style.display = 'flex';
@@ -314,6 +313,8 @@ function clearChat() {
         if (chatMessages) {
             chatMessages.innerHTML = '';
             localStorage.removeItem('chatHistory');
+            // Сервер тоже забывает диалог, чтобы GPT не учитывал старые вопросы
+            fetch('/chat/reset', { method: 'POST' }).catch(() => {});
             
             // Также очищаем подсказки
             const suggestionsContainer = document.getElementById('suggestions');
@@ -366,7 +367,7 @@ function saveChatHistory() {
     }
 }
 
-async function submitFeedback(question, feedback) {
+async function submitFeedback(question, feedback, answer) {
     try {
         await fetch('/feedback', {
             method: 'POST',
@@ -375,6 +376,7 @@ async function submitFeedback(question, feedback) {
             },
             body: JSON.stringify({
                 question: question,
+                answer: answer,
                 feedback: feedback
             })
         });
@@ -0,0 +1,66 @@
+# utils/assets.py
+"""Статика с хэшем в имени и заранее сжатыми вариантами.
+
+build_assets.py кладёт в static/dist/ копии файлов с хэшем содержимого в
+имени (style.3f2a9c1b7e4d.css), их .gz/.br варианты и manifest.json
+"исходный путь → путь с хэшем". asset_url() подставляет в шаблоны
+адрес с хэшем; если манифеста нет (разработка), остаётся обычный адрес.
+send_asset() отдаёт лучший вариант по Accept-Encoding. Файлы с хэшем
+кэшируются навсегда (immutable): при изменении файла меняется его адрес.
+"""
+import json
+import mimetypes
+import os
+
+from flask import request, send_from_directory, url_for
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Предпочтительный порядок кодировок: brotli сжимает текст лучше gzip
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_static_dir = "static"
+_manifest = {}
+
+def load_manifest(static_dir="static"):
+    """Читает static/dist/manifest.json; без него asset_url отдаёт исходные адреса"""
+    global _static_dir, _manifest
+    _static_dir = static_dir
+    path = os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            _manifest = json.load(f)
+    except (OSError, ValueError):
+        _manifest = {}
+    return _manifest
+
+def asset_url(filename):
+    """Аналог url_for('static', filename=...) с хэшем в имени файла"""
+    hashed = _manifest.get(filename)
+    if hashed:
+        return url_for("send_static", path=f"{DIST_DIR}/{hashed}")
+    return url_for("send_static", path=filename)
+
+def init_app(flask_app, static_dir="static"):
+    """Загружает манифест и делает asset_url доступной в шаблонах"""
+    load_manifest(static_dir)
+    flask_app.jinja_env.globals["asset_url"] = asset_url
+
+def send_asset(path):
+    """Отдаёт файл статики; для dist/ — сжатый вариант и вечное кэширование"""
+    if not path.startswith(f"{DIST_DIR}/"):
+        return send_from_directory(_static_dir, path)
+
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.isfile(os.path.join(_static_dir, path + suffix)):
+            response = send_from_directory(_static_dir, path + suffix, mimetype=mimetype)
+            response.headers["Content-Encoding"] = encoding
+            break
+    else:
+        response = send_from_directory(_static_dir, path, mimetype=mimetype)
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    response.vary.add("Accept-Encoding")
+    return response
@@ -0,0 +1,84 @@
+# utils/bounded_executor.py
+"""Ограниченный пул потоков для медленных вызовов с контролем очереди.
+
+Медленные вызовы (GPT) выполняются в отдельном пуле из max_workers потоков.
+Перед пулом стоит очередь не длиннее max_queue. Если очередь полна,
+run() сразу выбрасывает ExecutorOverloaded("queue_full"). Если вызов ждал
+начала дольше max_wait секунд, он снимается с очереди с причиной
+"wait_timeout". Так при перегрузке запросы не копятся, а быстро получают
+упрощённый ответ, и потоки воркера остаются свободны для дешёвых запросов.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import REGISTRY as METRICS
+
+EXECUTOR_QUEUE_WAIT = METRICS.histogram("dspace_executor_queue_wait_seconds",
+                                        "Ожидание свободного потока в пуле медленных вызовов", ["pool"])
+EXECUTOR_REJECTED = METRICS.counter("dspace_executor_rejected_total",
+                                    "Вызовы, отклонённые пулом медленных вызовов", ["pool", "reason"])
+
+class ExecutorOverloaded(Exception):
+    """Пул занят: очередь полна ("queue_full") или ожидание слишком долгое ("wait_timeout")"""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+class BoundedExecutor:
+    """executor = BoundedExecutor("gpt", 4, 4, 2.0); executor.run(fn, *args)"""
+
+    def __init__(self, name, max_workers=4, max_queue=4, max_wait=2.0):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.lock = threading.Lock()
+        self.pending = 0          # принятые вызовы: в очереди и выполняющиеся
+        self._pool = None
+
+    def _get_pool(self):
+        # Пул создаётся при первом вызове — уже в воркере gunicorn, а не в мастере до fork
+        if self._pool is None:
+            with self.lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix=f"{self.name}-pool")
+        return self._pool
+
+    def run(self, fn, *args, **kwargs):
+        """Выполняет fn в пуле и ждёт результата; при перегрузке — ExecutorOverloaded"""
+        with self.lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                EXECUTOR_REJECTED.inc(pool=self.name, reason="queue_full")
+                raise ExecutorOverloaded("queue_full")
+            self.pending += 1
+
+        submitted = time.perf_counter()
+        started = threading.Event()
+
+        def task():
+            started.set()
+            EXECUTOR_QUEUE_WAIT.observe(time.perf_counter() - submitted, pool=self.name)
+            return fn(*args, **kwargs)
+
+        try:
+            future = self._get_pool().submit(task)
+            # cancel() удаётся, только пока задача не начала выполняться
+            if not started.wait(self.max_wait) and future.cancel():
+                EXECUTOR_REJECTED.inc(pool=self.name, reason="wait_timeout")
+                raise ExecutorOverloaded("wait_timeout")
+            return future.result()
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+    def status(self):
+        with self.lock:
+            return {
+                "pending": self.pending,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "max_wait": self.max_wait,
+            }
@@ -0,0 +1,107 @@
+# utils/circuit_breaker.py
+"""Автомат защиты (circuit breaker) для вызовов внешнего сервиса.
+
+Состояния:
+- closed    — вызовы идут как обычно, исходы копятся в скользящем окне;
+- open      — доля ошибок в окне превысила порог: вызовы сразу отклоняются
+              (allow() → False) на open_seconds секунд;
+- half_open — после паузы пропускается half_open_calls пробных вызовов;
+              успех закрывает автомат, ошибка снова открывает.
+
+Автомат один на процесс и не знает, что именно вызывается: код вызова
+сам сообщает исход через record_success() / record_failure().
+"""
+import threading
+import time
+from collections import deque
+
+from utils.metrics import REGISTRY as METRICS
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+CIRCUIT_TRANSITIONS = METRICS.counter("dspace_circuit_transitions_total",
+                                      "Переходы автомата защиты в состояние", ["circuit", "state"])
+
+class CircuitBreaker:
+    """breaker = CircuitBreaker("gpt"); if breaker.allow(): ... breaker.record_success()"""
+
+    def __init__(self, name, window_seconds=60.0, min_calls=5, failure_ratio=0.5,
+                 open_seconds=30.0, half_open_calls=1):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trials = 0               # пробные вызовы, пропущенные в half_open
+        self.outcomes = deque()       # (время, успех) за последние window_seconds
+
+    def allow(self):
+        """Можно ли сейчас выполнить вызов"""
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    return False
+                self._transition(HALF_OPEN)
+            if self.trials < self.half_open_calls:
+                self.trials += 1
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self._transition(CLOSED)
+                return
+            self._record(True)
+
+    def record_failure(self):
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self._transition(OPEN)
+                return
+            if self.state == OPEN:
+                return
+            self._record(False)
+            failures = sum(1 for _, ok in self.outcomes if not ok)
+            if len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.failure_ratio:
+                self._transition(OPEN)
+
+    def status(self):
+        with self.lock:
+            now = time.monotonic()
+            self._trim(now)
+            retry_in = self.open_seconds - (now - self.opened_at) if self.state == OPEN else 0
+            return {
+                "state": self.state,
+                "calls": len(self.outcomes),
+                "failures": sum(1 for _, ok in self.outcomes if not ok),
+                "retry_in": round(max(0.0, retry_in), 1),
+            }
+
+    # - Внутреннее (под self.lock) -
+
+    def _record(self, ok):
+        now = time.monotonic()
+        self.outcomes.append((now, ok))
+        self._trim(now)
+
+    def _trim(self, now):
+        while self.outcomes and now - self.outcomes[0][0] > self.window_seconds:
+            self.outcomes.popleft()
+
+    def _transition(self, state):
+        self.state = state
+        self.trials = 0
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        # Новое состояние начинает счёт исходов с чистого окна
+        self.outcomes.clear()
+        CIRCUIT_TRANSITIONS.inc(circuit=self.name, state=state)
@@ -0,0 +1,103 @@
+# utils/compression.py
+"""Сжатие ответов (gzip / brotli) для HTML и JSON.
+
+Подключается как after_request: выбирает кодировку по Accept-Encoding,
+сжимает только ответы из списка типов и не меньше минимального размера.
+Не трогает потоковые ответы (в т.ч. text/event-stream), файлы из
+send_file и уже сжатые ответы. К сильному ETag добавляется суффикс
+кодировки ("abc" → "abc-br"), чтобы разные варианты не совпадали;
+etag_variants() помогает сравнивать If-None-Match с исходным тегом.
+
+Переменные окружения:
+    COMPRESS_ENABLED     — true | false
+    COMPRESS_MIN_SIZE    — минимальный размер тела в байтах (500)
+    COMPRESS_GZIP_LEVEL  — уровень gzip (6)
+    COMPRESS_BR_QUALITY  — качество brotli (4: быстро и лучше gzip на тексте)
+"""
+import gzip
+import os
+
+from flask import request
+
+from utils.metrics import REGISTRY as METRICS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() == "true"
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BR_QUALITY = int(os.getenv("COMPRESS_BR_QUALITY", "4"))
+
+COMPRESSIBLE_MIMETYPES = {
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/csv",
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "image/svg+xml",
+}
+
+ETAG_SUFFIXES = {"br": "-br", "gzip": "-gz"}
+
+COMPRESSION_BYTES = METRICS.counter("dspace_compression_bytes_total",
+                                    "Байт до и после сжатия ответов", ["encoding", "stage"])
+
+def compress(data, encoding):
+    """Сжимает тело ответа выбранной кодировкой"""
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESS_BR_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL)
+
+def choose_encoding(accept_encodings):
+    """Лучшая кодировка, которую принимает клиент; None — без сжатия"""
+    if brotli is not None and accept_encodings["br"]:
+        return "br"
+    if accept_encodings["gzip"]:
+        return "gzip"
+    return None
+
+def etag_variants(etag):
+    """Исходный ETag и его варианты после сжатия — для сравнения с If-None-Match"""
+    return [etag] + [etag + suffix for suffix in ETAG_SUFFIXES.values()]
+
+def compress_response(response):
+    """after_request: сжимает ответ, если это уместно"""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or "no-transform" in response.headers.get("Cache-Control", "")):
+        return response
+
+    # Ответ зависит от Accept-Encoding, даже если этот клиент сжатие не просил
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    compressed = compress(data, encoding)
+    if len(compressed) >= len(data):
+        return response
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(etag + ETAG_SUFFIXES[encoding], weak=weak)
+    COMPRESSION_BYTES.inc(len(data), encoding=encoding, stage="in")
+    COMPRESSION_BYTES.inc(len(compressed), encoding=encoding, stage="out")
+    return response
+
+def init_app(flask_app):
+    """Подключает сжатие ответов к приложению"""
+    if COMPRESS_ENABLED:
+        flask_app.after_request(compress_response)
@@ -0,0 +1,140 @@
+# utils/conversation.py
+"""Память диалогов: последние реплики каждого посетителя для уточняющих вопросов к GPT.
+
+ConversationStore держит историю в памяти процесса с жёсткими границами:
+- не больше max_sessions диалогов; при переполнении вытесняется тот,
+  к которому дольше всех не обращались (LRU);
+- диалог без обращений дольше ttl секунд удаляется;
+- суммарный объём текста всех диалогов не больше max_chars;
+- в одном диалоге хранится не больше max_messages реплик.
+Перед вызовом GPT history() отдаёт только свежие пары "вопрос — ответ",
+укладывающиеся в бюджет токенов, поэтому запрос не растёт с длиной диалога.
+
+Переменные окружения:
+    CONVERSATION_MAX_SESSIONS  — диалогов в памяти процесса (5000)
+    CONVERSATION_TTL           — секунд без обращений до удаления диалога (1800)
+    CONVERSATION_MAX_CHARS     — символов во всех диалогах процесса (4000000)
+    CONVERSATION_MAX_MESSAGES  — реплик в одном диалоге (20)
+    CONVERSATION_TOKEN_BUDGET  — токенов истории в запросе к GPT (1200; 0 — без истории)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.metrics import REGISTRY as METRICS
+
+CONVERSATION_MAX_SESSIONS = int(os.getenv("CONVERSATION_MAX_SESSIONS", "5000"))
+CONVERSATION_TTL = float(os.getenv("CONVERSATION_TTL", "1800"))
+CONVERSATION_MAX_CHARS = int(os.getenv("CONVERSATION_MAX_CHARS", "4000000"))
+CONVERSATION_MAX_MESSAGES = int(os.getenv("CONVERSATION_MAX_MESSAGES", "20"))
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "1200"))
+
+CONVERSATION_EVICTIONS = METRICS.counter("dspace_conversation_evictions_total",
+                                         "Диалоги, удалённые из памяти", ["reason"])
+CONVERSATION_TRIMMED = METRICS.counter("dspace_conversation_trimmed_messages_total",
+                                       "Реплики истории, не попавшие в запрос к GPT из-за бюджета токенов")
+
+def estimate_tokens(text):
+    """Грубая оценка числа токенов: около трёх символов русского текста на токен"""
+    return len(text) // 3 + 1
+
+class _Conversation:
+    __slots__ = ("messages", "chars", "last_seen")
+
+    def __init__(self):
+        self.messages = []
+        self.chars = 0
+        self.last_seen = 0.0
+
+class ConversationStore:
+    """Потокобезопасное хранилище диалогов: store.history(id), store.append(id, вопрос, ответ)"""
+
+    def __init__(self, max_sessions=CONVERSATION_MAX_SESSIONS, ttl=CONVERSATION_TTL,
+                 max_chars=CONVERSATION_MAX_CHARS, max_messages=CONVERSATION_MAX_MESSAGES):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_chars = max_chars
+        self.max_messages = max_messages
+        self.lock = threading.Lock()
+        self.sessions = OrderedDict()   # id → _Conversation, от давно не активных к свежим
+        self.total_chars = 0
+
+    def history(self, session_id, token_budget=CONVERSATION_TOKEN_BUDGET):
+        """Последние пары реплик в формате сообщений Yandex GPT, не больше token_budget токенов"""
+        if not session_id or token_budget <= 0:
+            return []
+        with self.lock:
+            self._expire(time.monotonic())
+            conversation = self.sessions.get(session_id)
+            if conversation is None:
+                return []
+            messages = list(conversation.messages)
+
+        # Идём от свежих пар к старым, пока укладываемся в бюджет
+        kept = []
+        used = 0
+        for start in range(len(messages) - 2, -1, -2):
+            pair = messages[start:start + 2]
+            cost = sum(estimate_tokens(m["text"]) for m in pair)
+            if used + cost > token_budget:
+                CONVERSATION_TRIMMED.inc(start + 2)
+                break
+            kept[:0] = pair
+            used += cost
+        return kept
+
+    def append(self, session_id, question, answer):
+        """Запоминает пару "вопрос — ответ" и вытесняет лишнее"""
+        if not session_id:
+            return
+        now = time.monotonic()
+        with self.lock:
+            conversation = self.sessions.pop(session_id, None) or _Conversation()
+            conversation.messages.append({"role": "user", "text": question})
+            conversation.messages.append({"role": "assistant", "text": answer})
+            added = len(question) + len(answer)
+            conversation.chars += added
+            self.total_chars += added
+            while len(conversation.messages) > self.max_messages:
+                dropped = conversation.messages[:2]
+                del conversation.messages[:2]
+                removed = sum(len(m["text"]) for m in dropped)
+                conversation.chars -= removed
+                self.total_chars -= removed
+            conversation.last_seen = now
+            self.sessions[session_id] = conversation
+            self._expire(now)
+            self._enforce_limits()
+
+    def forget(self, session_id):
+        """Удаляет диалог (например, посетитель очистил чат)"""
+        with self.lock:
+            conversation = self.sessions.pop(session_id, None)
+            if conversation is not None:
+                self.total_chars -= conversation.chars
+
+    def stats(self):
+        with self.lock:
+            return {"sessions": len(self.sessions), "chars": self.total_chars}
+
+    # - Вытеснение (вызывается под self.lock) -
+
+    def _evict_oldest(self, reason):
+        _session_id, conversation = self.sessions.popitem(last=False)
+        self.total_chars -= conversation.chars
+        CONVERSATION_EVICTIONS.inc(reason=reason)
+
+    def _expire(self, now):
+        while self.sessions:
+            oldest = next(iter(self.sessions.values()))
+            if now - oldest.last_seen < self.ttl:
+                break
+            self._evict_oldest("ttl")
+
+    def _enforce_limits(self):
+        while len(self.sessions) > self.max_sessions:
+            self._evict_oldest("lru")
+        # Самый свежий диалог не вытесняем, даже если он один превышает лимит
+        while self.total_chars > self.max_chars and len(self.sessions) > 1:
+            self._evict_oldest("memory")
@@ -0,0 +1,192 @@
+# utils/hedging.py
+"""Дублирующие (hedged) запросы против редких очень медленных ответов.
+
+HedgedCaller.call(fn) запускает fn в своём пуле потоков. Если результата
+нет дольше порога, параллельно запускается ровно один дубль, и
+возвращается первый подходящий результат (accept). Порог — заданный
+перцентиль времени подходящих ответов за последние window вызовов.
+Пока замеров меньше min_samples, дубли не отправляются.
+
+Дубль — лишний запрос к сервису, поэтому доля вызовов с дублем за
+последние window вызовов ограничена max_ratio. Если лимит исчерпан,
+вызов просто ждёт первый запрос. Дубль не отправляется и после
+hedge_until (time.monotonic()): у него не останется времени на ответ.
+
+Опоздавший запрос ещё занимает поток пула до своего таймаута. Чтобы
+вызовы не ждали в очереди пула (она не ограничена), запросы уходят в
+пул, только пока в нём есть свободные потоки для пары «запрос + дубль»;
+иначе fn выполняется прямо в вызывающем потоке, без дубля.
+
+Метрики: dspace_hedged_requests_total{event} — sent (отправлено дублей,
+то есть лишних запросов), won / lost (дубль ответил первым / опоздал),
+capped (дубль не отправлен из-за лимита), no_capacity (пул занят — вызов
+без дубля); dspace_hedge_saved_seconds_total —
+на сколько секунд раньше пришёл ответ, когда выиграл дубль.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from utils.metrics import REGISTRY as METRICS
+
+HEDGED_REQUESTS = METRICS.counter("dspace_hedged_requests_total",
+                                  "Дублирующие запросы к медленному сервису", ["target", "event"])
+HEDGE_SAVED_SECONDS = METRICS.counter("dspace_hedge_saved_seconds_total",
+                                      "Сколько секунд сэкономили выигравшие дубли", ["target"])
+
+class HedgedCaller:
+    """hedger = HedgedCaller("gpt"); hedger.call(lambda: requests.post(...), accept=lambda r: r.ok)"""
+
+    def __init__(self, name, percentile=95, min_samples=20, window=200, max_ratio=0.05, max_workers=8):
+        self.name = name
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_ratio = max_ratio
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)   # время подходящих ответов, секунды
+        self.hedged = deque(maxlen=window)      # был ли дубль у каждого вызова
+        self.active = 0                         # запросы, отданные пулу и ещё не завершённые
+        self._pool = None
+
+    def _get_pool(self):
+        # Как в BoundedExecutor: пул создаётся в воркере gunicorn, а не в мастере до fork
+        if self._pool is None:
+            with self.lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix=f"{self.name}-hedge")
+        return self._pool
+
+    def threshold(self):
+        """Через сколько секунд отправлять дубль; None — замеров пока мало"""
+        with self.lock:
+            if len(self.latencies) < self.min_samples:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+
+    def _may_hedge(self):
+        with self.lock:
+            allowed = (sum(self.hedged) + 1) / (len(self.hedged) + 1) <= self.max_ratio
+            self.hedged.append(allowed)
+            return allowed
+
+    def _reserve(self, slots):
+        """Занимает slots потоков пула; False — свободных потоков не хватает"""
+        with self.lock:
+            if self.active + slots > self.max_workers:
+                return False
+            self.active += slots
+            return True
+
+    def _submit(self, fn, accept):
+        """Отдаёт fn пулу; поток должен быть заранее занят через _reserve"""
+        started = time.perf_counter()
+
+        def task():
+            try:
+                result = fn()
+                elapsed = time.perf_counter() - started
+                if accept(result):
+                    with self.lock:
+                        self.latencies.append(elapsed)
+                return result, elapsed
+            finally:
+                with self.lock:
+                    self.active -= 1
+
+        return self._get_pool().submit(task)
+
+    def call(self, fn, accept=lambda result: True, hedge_until=None):
+        """Результат fn; если fn отвечает дольше порога — первый подходящий из fn и её дубля.
+
+        fn вызывается без аргументов и сама считает свой таймаут в момент
+        запуска: дубль стартует позже и должен уложиться в оставшееся время.
+        """
+        started = time.perf_counter()
+        delay = self.threshold()
+        if delay is None:
+            with self.lock:
+                self.hedged.append(False)
+            result = fn()
+            if accept(result):
+                with self.lock:
+                    self.latencies.append(time.perf_counter() - started)
+            return result
+        # Место сразу под запрос и возможный дубль: иначе ждать пришлось бы в очереди пула
+        if not self._reserve(2):
+            HEDGED_REQUESTS.inc(target=self.name, event="no_capacity")
+            with self.lock:
+                self.hedged.append(False)
+            return fn()
+        primary = self._submit(fn, accept)
+        if wait([primary], timeout=delay).done:
+            self._release(1)
+            with self.lock:
+                self.hedged.append(False)
+            return primary.result()[0]
+        if hedge_until is not None and time.monotonic() >= hedge_until:
+            self._release(1)
+            with self.lock:
+                self.hedged.append(False)
+            return primary.result()[0]
+        if not self._may_hedge():
+            self._release(1)
+            HEDGED_REQUESTS.inc(target=self.name, event="capped")
+            return primary.result()[0]
+
+        hedge_offset = time.perf_counter() - started
+        hedge = self._submit(fn, accept)
+        HEDGED_REQUESTS.inc(target=self.name, event="sent")
+        pending = {primary, hedge}
+        fallback = None
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                result, elapsed = future.result()
+                if not accept(result):
+                    fallback = fallback or (result,)
+                    continue
+                if future is hedge:
+                    HEDGED_REQUESTS.inc(target=self.name, event="won")
+                    self._count_saved(primary, hedge_offset + elapsed)
+                else:
+                    HEDGED_REQUESTS.inc(target=self.name, event="lost")
+                return result
+        # Подходящего ответа нет ни у одного — отдаём, что есть, и пусть решает вызывающий
+        if fallback is not None:
+            return fallback[0]
+        raise error
+
+    def _release(self, slots):
+        """Возвращает зарезервированные, но не понадобившиеся потоки"""
+        with self.lock:
+            self.active -= slots
+
+    def _count_saved(self, primary, won_at):
+        """Когда первый запрос всё-таки завершится, записывает, на сколько раньше ответил дубль.
+
+        won_at — через сколько секунд после начала вызова ответил дубль.
+        """
+        def done(future):
+            if future.exception() is None:
+                HEDGE_SAVED_SECONDS.inc(max(0.0, future.result()[1] - won_at), target=self.name)
+        primary.add_done_callback(done)
+
+    def status(self):
+        with self.lock:
+            hedged = sum(self.hedged)
+            calls = len(self.hedged)
+        threshold = self.threshold()
+        return {
+            "active": self.active,
+            "threshold": round(threshold, 3) if threshold is not None else None,
+            "hedge_ratio": round(hedged / calls, 3) if calls else 0.0,
+            "max_ratio": self.max_ratio,
+        }
@@ -0,0 +1,87 @@
+# utils/json_files.py
+"""Запись JSON-файлов данных из нескольких воркеров gunicorn.
+
+Под gthread запросы к одному файлу идут из разных потоков и процессов
+одновременно. Чтобы запись не обрезала файл посреди чтения другим
+воркером, write_json пишет во временный файл и подменяет им исходный
+через os.replace. Чтобы два «прочитал-дописал-записал» (журнал диалогов,
+оценки, бронирования) не затирали друг друга, update_json держит
+файловую блокировку (fcntl.flock на <файл>.lock) от чтения до записи;
+под той же блокировкой пишет и write_json. Там, где fcntl нет (Windows),
+остаётся только блокировка внутри процесса.
+"""
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+def _thread_lock(path):
+    with _locks_guard:
+        return _locks.setdefault(os.path.abspath(path), threading.Lock())
+
+@contextmanager
+def file_lock(path):
+    """with file_lock("bot_log.json"): — блокировка файла между потоками и процессами"""
+    with _thread_lock(path):
+        lock_file = None
+        if fcntl is not None:
+            try:
+                lock_file = open(f"{path}.lock", "a")
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            except OSError as e:
+                log.warning(f"Файловая блокировка {path} недоступна: {e}")
+                if lock_file is not None:
+                    lock_file.close()
+                lock_file = None
+        try:
+            yield
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+def _replace(path, data, indent):
+    """Атомарная запись: временный файл рядом с исходным + os.replace"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def read_json(path, default):
+    """Содержимое JSON-файла; default() — если файла нет или он пуст"""
+    if not os.path.exists(path):
+        return default()
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read().strip()
+    return json.loads(content) if content else default()
+
+def write_json(path, data, indent=4):
+    """Записывает data в path целиком; ошибки записи пробрасываются вызывающему"""
+    with file_lock(path):
+        _replace(path, data, indent)
+
+@contextmanager
+def update_json(path, default=list, indent=4):
+    """with update_json("feedback.json") as logs: logs.append(...) — чтение и запись под одной блокировкой"""
+    with file_lock(path):
+        data = read_json(path, default)
+        yield data
+        _replace(path, data, indent)
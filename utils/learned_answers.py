@@ -0,0 +1,196 @@
+# utils/learned_answers.py
+"""Ответы GPT, заслужившие хорошие оценки: слой между базой знаний и GPT.
+
+Каждый ответ GPT запоминается по нормализованному вопросу как кандидат.
+Оценки посетителей (/feedback) копятся у кандидата: не больше одной от
+каждого посетителя (voter — идентификатор диалога из сессии), а хорошая
+засчитывается, только если посетитель прислал текст оценённого ответа и
+он совпадает с запомненным. Когда набралось не
+меньше min_good оценок "good" и ни одной "bad", ответ начинает выдаваться
+без обращения к GPT. Одна плохая оценка навсегда (до истечения срока)
+закрывает кандидату дорогу. Выданные ответы живут ttl секунд после
+повышения, кандидаты без повышения — ttl секунд после появления: потом
+вопрос снова уходит в GPT и набирает оценки заново. Вопросы из списка
+вето (его ведёт администратор) не запоминаются вовсе.
+
+Данные хранятся в одном JSON-файле. Воркеры gunicorn перечитывают его,
+если он изменился, и пишут атомарно (временный файл + os.replace).
+Чтение-изменение-запись идёт под файловой блокировкой из
+utils.json_files, чтобы воркеры не затирали оценки друг друга.
+Ошибка записи (например, файловая система только для чтения) только
+логируется: изменения остаются в памяти процесса, ответ посетителю
+не страдает.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from utils.json_files import file_lock
+from utils.metrics import REGISTRY as METRICS
+from utils.normalize import normalize_question
+
+LEARNED_EVENTS = METRICS.counter("dspace_learned_answers_total",
+                                 "События слоя оценённых ответов GPT", ["event"])
+
+log = logging.getLogger(__name__)
+
+GOOD_FEEDBACK = ("good", "1", 1, True)
+BAD_FEEDBACK = ("bad", "0", 0, False)
+
+class LearnedAnswers:
+    """answers = LearnedAnswers("learned_answers.json"); answers.lookup(вопрос)"""
+
+    def __init__(self, path, min_good=3, ttl=30 * 86400, max_entries=2000):
+        self.path = path
+        self.min_good = min_good
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = {}     # нормализованный вопрос → запись
+        self.veto = set()
+        self._mtime = None
+
+    # - Чтение -
+
+    def lookup(self, question):
+        """Оценённый ответ на вопрос или None"""
+        self._refresh()
+        entry = self.entries.get(normalize_question(question))
+        if entry is None or entry.get("promoted_at") is None:
+            return None
+        if time.time() - entry["promoted_at"] > self.ttl:
+            return None
+        return entry["answer"]
+
+    def snapshot(self):
+        """Записи и список вето для страницы администратора"""
+        self._refresh()
+        with self.lock:
+            entries = [dict(entry, key=key) for key, entry in self.entries.items()]
+            return entries, sorted(self.veto)
+
+    # - Изменение -
+
+    def record(self, question, answer):
+        """Запоминает ответ GPT как кандидата (если вопрос ещё не запомнен и не под вето)"""
+        key = normalize_question(question)
+        if not key:
+            return False
+        # Частый случай — вопрос уже запомнен: обходимся без записи файла
+        self._refresh()
+        if key in self.veto or key in self.entries:
+            return False
+        with self._modify() as entries:
+            if key in self.veto or key in entries:
+                return False
+            entries[key] = {"question": question, "answer": answer, "good": 0, "bad": 0, "voters": [],
+                            "created_at": time.time(), "promoted_at": None}
+            return True
+
+    def rate(self, question, feedback, answer=None, voter=None):
+        """Учитывает оценку посетителя voter; answer — текст, который он видел"""
+        key = normalize_question(question or "")
+        self._refresh()
+        if not voter or key not in self.entries:
+            return False
+        with self._modify() as entries:
+            entry = entries.get(key)
+            # Оценка относится к другому ответу (например, GPT ответил иначе) — не считаем
+            if entry is None or (answer is not None and answer.strip() != entry["answer"].strip()):
+                return False
+            voters = entry.setdefault("voters", [])
+            if voter in voters:
+                return False
+            if feedback in GOOD_FEEDBACK:
+                # Хорошая оценка без текста ответа может относиться к чему угодно
+                if answer is None:
+                    return False
+                entry["good"] += 1
+            elif feedback in BAD_FEEDBACK:
+                entry["bad"] += 1
+                if entry["promoted_at"] is not None:
+                    entry["promoted_at"] = None
+                    LEARNED_EVENTS.inc(event="demoted")
+            else:
+                return False
+            voters.append(voter)
+            if entry["promoted_at"] is None and entry["bad"] == 0 and entry["good"] >= self.min_good:
+                entry["promoted_at"] = time.time()
+                LEARNED_EVENTS.inc(event="promoted")
+            return True
+
+    def set_veto(self, question, vetoed=True):
+        """Добавляет вопрос в список вето (и забывает ответ) или убирает из него"""
+        key = normalize_question(question)
+        with self._modify() as entries:
+            if vetoed:
+                self.veto.add(key)
+                if entries.pop(key, None) is not None:
+                    LEARNED_EVENTS.inc(event="vetoed")
+            else:
+                self.veto.discard(key)
+            return True
+
+    # - Хранение -
+
+    def _refresh(self):
+        """Перечитывает файл, если его изменил другой процесс"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        with self.lock:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._mtime = os.stat(self.path).st_mtime_ns
+        except (OSError, ValueError):
+            return
+        self.entries = data.get("entries", {})
+        self.veto = set(data.get("veto", []))
+
+    def _expire(self, entries):
+        now = time.time()
+        for key in [k for k, e in entries.items() if now - (e["promoted_at"] or e["created_at"]) > self.ttl]:
+            del entries[key]
+            LEARNED_EVENTS.inc(event="expired")
+        # Сверх лимита первыми уходят самые старые неповышенные кандидаты
+        overflow = len(entries) - self.max_entries
+        if overflow > 0:
+            pending = sorted((e["created_at"], k) for k, e in entries.items() if e["promoted_at"] is None)
+            for _, key in pending[:overflow]:
+                del entries[key]
+
+    @contextmanager
+    def _modify(self):
+        """with self._modify() as entries: — свежие данные с диска, изменение и запись под блокировкой"""
+        with self.lock, file_lock(self.path):
+            self._load()
+            self._expire(self.entries)
+            yield self.entries
+            self._save()
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"updated": datetime.now().isoformat(timespec="seconds"),
+                           "entries": self.entries, "veto": sorted(self.veto)},
+                          f, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, self.path)
+            self._mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            log.error(f"Ошибка сохранения оценённых ответов: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
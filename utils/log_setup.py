@@ -0,0 +1,147 @@
+# utils/log_setup.py
+"""Неблокирующее структурированное логирование.
+
+Обработчики запросов кладут записи в очередь (QueueHandler) и сразу идут
+дальше; запись в файл и stdout делает фоновый QueueListener. Записи
+форматируются в JSON (или текст).
+
+Файл по умолчанию открывается через WatchedFileHandler: все воркеры
+gunicorn дописывают строки в один файл, а ротирует его внешний logrotate
+(обработчик сам переоткроет файл после переименования). Ротация силами
+процесса (size | time) безопасна только для одного процесса на файл —
+с несколькими воркерами добавьте {pid} в LOG_FILE.
+
+Переменные окружения:
+    LOG_LEVEL         — уровень (INFO); DEBUG включает подробный разбор /chat
+    LOG_FORMAT        — json | text
+    LOG_FILE          — путь к файлу (audit.log); {pid} подставляет PID воркера
+    LOG_ROTATE        — external (по умолчанию) | size | time
+    LOG_MAX_BYTES     — размер файла для ротации по размеру (10 МБ)
+    LOG_ROTATE_WHEN   — интервал ротации по времени (midnight)
+    LOG_BACKUP_COUNT  — сколько старых файлов хранить (5)
+    LOG_STDOUT        — true | false, дублировать ли в stdout
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+
+# Стандартные атрибуты LogRecord — всё остальное считаем полями из extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Как QueueHandler, но трассировка исключения остаётся отдельным полем, а не частью msg"""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Текстовый формат; трассировка исключения — следующими строками"""
+
+    def format(self, record):
+        text = super().format(record)
+        exc = getattr(record, "exc", None)
+        return f"{text}\n{exc}" if exc else text
+
+def _build_handlers():
+    """Реальные обработчики, которые работают в потоке QueueListener"""
+    if os.getenv("LOG_FORMAT", "json").lower() == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = TextFormatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+
+    handlers = []
+    log_file = os.getenv("LOG_FILE", "audit.log").replace("{pid}", str(os.getpid()))
+    if log_file:
+        backup_count = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+        rotate = os.getenv("LOG_ROTATE", "external").lower()
+        if rotate == "time":
+            file_handler = logging.handlers.TimedRotatingFileHandler(
+                log_file, when=os.getenv("LOG_ROTATE_WHEN", "midnight"),
+                backupCount=backup_count, encoding="utf-8", delay=True)
+        elif rotate == "size":
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+                backupCount=backup_count, encoding="utf-8", delay=True)
+        else:
+            file_handler = logging.handlers.WatchedFileHandler(log_file, encoding="utf-8", delay=True)
+        handlers.append(file_handler)
+
+    if os.getenv("LOG_STDOUT", "true").lower() == "true":
+        handlers.append(logging.StreamHandler(sys.stdout))
+
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+def _start_listener():
+    global _listener
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, *_build_handlers(), respect_handler_level=True)
+    _listener.start()
+    return log_queue
+
+def _restart_after_fork():
+    """Поток слушателя не переживает fork — в дочернем процессе запускаем новый"""
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, _QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(_QueueHandler(_start_listener()))
+
+def stop_logging():
+    """Дописывает очередь и останавливает фоновый поток"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def configure_logging():
+    """Настраивает корневой логгер на очередь; повторный вызов ничего не делает"""
+    if _listener is not None:
+        return
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_QueueHandler(_start_listener()))
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    # Шумные логгеры библиотек
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    logging.getLogger("urllib3").setLevel(logging.WARNING)
+
+    atexit.register(stop_logging)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_restart_after_fork)
@@ -0,0 +1,204 @@
+# utils/metrics.py
+"""Лёгкие метрики (счётчики и гистограммы) в текстовом формате Prometheus.
+
+Каждый процесс копит значения в памяти. Если задана переменная METRICS_DIR,
+фоновый поток процесса раз в METRICS_FLUSH_SECONDS сбрасывает значения в
+METRICS_DIR/metrics_<pid>.json, а /metrics суммирует файлы всех воркеров
+gunicorn. Запись на диск никогда не происходит в потоке запроса.
+Каталог стоит очищать перед запуском сервера.
+"""
+import functools
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "1"))
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class Registry:
+    """Хранилище метрик одного процесса"""
+
+    def __init__(self, directory=None, flush_seconds=1.0):
+        self.lock = threading.Lock()
+        self.meta = {}        # имя → (тип, описание, метки, границы корзин)
+        self.values = {}      # (имя, значения меток) → число или [корзины..., сумма, количество]
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self._flusher_pid = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def counter(self, name, documentation, labels=()):
+        self.meta[name] = ("counter", documentation, tuple(labels), None)
+        return Counter(self, name, tuple(labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.meta[name] = ("histogram", documentation, tuple(labels), tuple(buckets))
+        return Histogram(self, name, tuple(labels), tuple(buckets))
+
+    def _ensure_flusher(self):
+        """Запускает фоновый сброс в METRICS_DIR (заново после fork воркера)"""
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        with self.lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+    def snapshot(self):
+        """Копия значений, пригодная для JSON"""
+        with self.lock:
+            return [[name, list(labels), value if isinstance(value, float) else list(value)]
+                    for (name, labels), value in self.values.items()]
+
+    def flush(self):
+        """Сбрасывает значения процесса в METRICS_DIR (атомарно)"""
+        path = os.path.join(self.directory, f"metrics_{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def collect(self):
+        """Значения всех процессов: свои — из памяти, чужие — из METRICS_DIR"""
+        merged = {}
+
+        def merge(rows):
+            for name, labels, value in rows:
+                key = (name, tuple(labels))
+                if isinstance(value, list):
+                    current = merged.setdefault(key, [0.0] * len(value))
+                    for i, v in enumerate(value):
+                        current[i] += v
+                else:
+                    merged[key] = merged.get(key, 0.0) + value
+
+        merge(self.snapshot())
+        if self.directory:
+            own = os.path.join(self.directory, f"metrics_{os.getpid()}.json")
+            for path in glob.glob(os.path.join(self.directory, "metrics_*.json")):
+                if path == own:
+                    continue
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        merge(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return merged
+
+    def render(self):
+        """Текстовый формат Prometheus (exposition format 0.0.4)"""
+        merged = self.collect()
+        lines = []
+        for name, (kind, documentation, label_names, buckets) in sorted(self.meta.items()):
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (metric, labels), value in sorted(merged.items()):
+                if metric != name:
+                    continue
+                pairs = list(zip(label_names, labels))
+                if kind == "counter":
+                    lines.append(f"{name}{_format_labels(pairs)} {_format_number(value)}")
+                    continue
+                cumulative = 0.0
+                for bound, count in zip(buckets, value):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(pairs + [('le', _format_number(bound))])} "
+                                 f"{_format_number(cumulative)}")
+                total_count = value[-1]
+                lines.append(f"{name}_bucket{_format_labels(pairs + [('le', '+Inf')])} {_format_number(total_count)}")
+                lines.append(f"{name}_sum{_format_labels(pairs)} {_format_number(value[-2])}")
+                lines.append(f"{name}_count{_format_labels(pairs)} {_format_number(total_count)}")
+        return "\n".join(lines) + "\n"
+
+class Counter:
+    """Монотонный счётчик с метками"""
+
+    def __init__(self, registry, name, label_names):
+        self.registry = registry
+        self.name = name
+        self.label_names = label_names
+
+    def inc(self, amount=1, **labels):
+        key = (self.name, tuple(str(labels.get(n, "")) for n in self.label_names))
+        registry = self.registry
+        with registry.lock:
+            registry.values[key] = registry.values.get(key, 0.0) + amount
+        registry._ensure_flusher()
+
+class Histogram:
+    """Гистограмма длительностей в секундах"""
+
+    def __init__(self, registry, name, label_names, buckets):
+        self.registry = registry
+        self.name = name
+        self.label_names = label_names
+        self.buckets = buckets
+
+    def observe(self, value, **labels):
+        key = (self.name, tuple(str(labels.get(n, "")) for n in self.label_names))
+        registry = self.registry
+        with registry.lock:
+            data = registry.values.get(key)
+            if data is None:
+                # корзины (не кумулятивные) + сумма + количество
+                data = registry.values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+                    break
+            data[-2] += value
+            data[-1] += 1
+        registry._ensure_flusher()
+
+    @contextmanager
+    def time(self, **labels):
+        """with HISTOGRAM.time(stage="..."): — замер блока кода"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def timed(self, **labels):
+        """Декоратор: замеряет каждый вызов функции"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, **labels)
+            return wrapper
+        return decorator
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _format_number(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+# Реестр процесса
+REGISTRY = Registry(METRICS_DIR, METRICS_FLUSH_SECONDS)
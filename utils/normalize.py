@@ -0,0 +1,162 @@
+# utils/normalize.py
+"""Нормализация вопросов посетителей для поиска ответа.
+
+normalize_question() повторена в static/js/offline_answers.js: браузер и
+сервер должны приводить вопрос к одному ключу. Меняете её здесь — поменяйте
+и там.
+
+QueryCorrector исправляет вопросы, которые иначе не нашлись бы в базе:
+- набранные не в той раскладке (",fnens" → "батуты", "мк" → "vr");
+- написанные транслитом ("batuty" → "батуты");
+- с опечатками ("батуыт" → "батуты") — по словарю заранее вычисленных
+  удалений (как в SymSpell): на слово приходится ограниченное число
+  обращений к словарю, независимо от размера базы.
+Словарь строится из известных вопросов (база знаний, подсказки); латинские
+слова из него доступны и кириллицей ("dh" → "вр" → "vr"). Слова, которые
+в нём уже есть, не меняются. Транслит и другая раскладка тоже сверяются
+с опечатками, у каждого варианта свой бюджет правок ("baty" → "баты" →
+"батуты", "dhf" → "вра" → "vr").
+"""
+import functools
+import re
+from collections import Counter
+
+_NON_WORD = re.compile(r"[^0-9a-zа-я]+")
+
+def normalize_question(text):
+    """'  Сколько стоит VR?! ' → 'сколько стоит vr' (регистр, ё, пунктуация, пробелы)"""
+    return _NON_WORD.sub(" ", text.lower().replace("ё", "е")).strip()
+
+# - Раскладка клавиатуры и транслит -
+
+LATIN_KEYS = "`qwertyuiop[]asdfghjkl;'zxcvbnm,."
+CYRILLIC_KEYS = "ёйцукенгшщзхъфывапролджэячсмитьбю"
+_SWAP_LAYOUT = str.maketrans(LATIN_KEYS + CYRILLIC_KEYS, CYRILLIC_KEYS + LATIN_KEYS)
+
+# Сначала длинные сочетания: "shch" раньше "sh" и "ch"
+TRANSLIT = (
+    ("shch", "щ"), ("sch", "щ"), ("zh", "ж"), ("kh", "х"), ("ts", "ц"), ("ch", "ч"), ("sh", "ш"),
+    ("yu", "ю"), ("ya", "я"), ("yo", "е"), ("ye", "е"), ("a", "а"), ("b", "б"), ("c", "к"),
+    ("d", "д"), ("e", "е"), ("f", "ф"), ("g", "г"), ("h", "х"), ("i", "и"), ("j", "й"),
+    ("k", "к"), ("l", "л"), ("m", "м"), ("n", "н"), ("o", "о"), ("p", "п"), ("q", "к"),
+    ("r", "р"), ("s", "с"), ("t", "т"), ("u", "у"), ("v", "в"), ("w", "в"), ("x", "кс"),
+    ("y", "ы"), ("z", "з"),
+)
+_TRANSLIT_RE = re.compile("|".join(latin for latin, _ in TRANSLIT))
+_TRANSLIT_MAP = dict(TRANSLIT)
+
+def swap_layout(text):
+    """Текст, набранный не в той раскладке: ',fnens' → 'батуты', 'мк' → 'vr'"""
+    return text.translate(_SWAP_LAYOUT)
+
+def translit_to_cyrillic(word):
+    """'batuty' → 'батуты' (латиница в кириллицу по звучанию)"""
+    return _TRANSLIT_RE.sub(lambda m: _TRANSLIT_MAP[m.group()], word)
+
+# - Исправление опечаток -
+
+def edit_distance(a, b):
+    """Расстояние Дамерау — Левенштейна (с перестановкой соседних букв)"""
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+def _deletes(word, depth):
+    """Все варианты слова без 1..depth букв"""
+    result = set()
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        result |= frontier
+    return result
+
+def max_edits(word):
+    """Сколько опечаток допускаем: в коротких словах любая правка меняет смысл"""
+    if len(word) < 3:
+        return 0
+    return 1 if len(word) <= 4 else 2
+
+def translit_edits(word):
+    """Бюджет для транслита: он теряет буквы ("baty" → "баты" вместо "батуты"), поэтому на правку больше"""
+    if len(word) < 3:
+        return 0
+    return min(2, max_edits(word) + 1)
+
+class QueryCorrector:
+    """corrector = QueryCorrector(известные вопросы); corrector.correct(',fnens') → 'батуты'
+
+    >>> corrector = QueryCorrector(["батуты", "vr", "нерф", "сколько стоит"])
+    >>> [corrector.correct(q) for q in ("dhf", ",fnens", "baty", "nerf", "мк", "батуыт")]
+    ['vr', 'батуты', 'батуты', 'нерф', 'vr', 'батуты']
+    >>> corrector.correct("cnjbn baty")
+    'стоит батуты'
+    """
+
+    MAX_EDITS = 2
+
+    def __init__(self, phrases):
+        self.vocabulary = Counter(word for phrase in phrases for word in normalize_question(phrase).split())
+        # Написание → известное слово. Латинские слова доступны и кириллицей: "вр" → "vr"
+        self.forms = {word: word for word in self.vocabulary}
+        for word in self.vocabulary:
+            if word.isascii() and word.isalpha():
+                self.forms.setdefault(translit_to_cyrillic(word), word)
+        self.deletes = {}
+        for form, word in self.forms.items():
+            for variant in _deletes(form, min(self.MAX_EDITS, max_edits(form))) | {form}:
+                self.deletes.setdefault(variant, []).append((form, word))
+        self.correct_word = functools.lru_cache(maxsize=4096)(self._correct_word)
+
+    def correct(self, text):
+        """Нормализованный вопрос с исправленными словами"""
+        words = []
+        for raw in text.lower().split():
+            plain = normalize_question(raw).split()
+            if all(word in self.vocabulary for word in plain):
+                words.extend(plain)
+                continue
+            # Раскладку проверяем на исходном слове: ",fnens" без запятой уже не "батуты"
+            swapped = normalize_question(swap_layout(raw)).split()
+            if swapped and all(word in self.forms for word in swapped):
+                words.extend(self.forms[word] for word in swapped)
+                continue
+            if len(swapped) != len(plain):
+                swapped = [None] * len(plain)
+            words.extend(self.correct_word(word, layout) for word, layout in zip(plain, swapped))
+        return " ".join(words)
+
+    def _correct_word(self, word, layout=None):
+        """Ближайшее известное слово к самому слову, его транслиту и слову в другой раскладке.
+
+        У каждого варианта свой бюджет правок: опечатка считается от того
+        написания, в котором посетитель на самом деле набирал слово.
+        """
+        if word in self.vocabulary:
+            return word
+        candidates = [(word, max_edits(word))]
+        if word.isascii() and word.isalpha():
+            cyrillic = translit_to_cyrillic(word)
+            if cyrillic in self.forms:
+                return self.forms[cyrillic]
+            candidates.append((cyrillic, translit_edits(cyrillic)))
+        if layout and layout != word:
+            candidates.append((layout, max_edits(layout)))
+        best = None
+        for candidate, limit in candidates:
+            if not candidate.isalpha():
+                continue
+            for variant in _deletes(candidate, limit) | {candidate}:
+                for form, known in self.deletes.get(variant, ()):
+                    distance = edit_distance(candidate, form)
+                    if distance <= limit:
+                        rank = (distance, -self.vocabulary[known])
+                        if best is None or rank < best[0]:
+                            best = (rank, known)
+        return best[1] if best else word
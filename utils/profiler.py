@@ -0,0 +1,176 @@
+# utils/profiler.py
+"""Сэмплирующий профайлер, включаемый на лету.
+
+SamplingProfiler оборачивает WSGI-приложение и не трогает код маршрутов.
+В выключенном состоянии каждый запрос стоит одной проверки атрибута. После
+включения (на N секунд, для доли запросов) фоновый поток раз в interval
+секунд снимает стеки потоков, обслуживающих выбранные запросы, через
+sys._current_frames(). По окончании стеки пишутся в каталог отдельно для
+каждого эндпоинта в формате collapsed stacks ("a;b;c 42"). Этот формат
+понимают flamegraph.pl, speedscope и inferno.
+"""
+import os
+import random
+import re
+import signal
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from werkzeug.exceptions import HTTPException
+from werkzeug.wsgi import ClosingIterator
+
+class SamplingProfiler:
+    """WSGI-обёртка: app.wsgi_app = SamplingProfiler(app.wsgi_app, app.url_map, "profiles")"""
+
+    def __init__(self, wsgi_app, url_map, output_dir="profiles", interval=0.005):
+        self.app = wsgi_app
+        self.url_map = url_map
+        self.output_dir = output_dir
+        self.default_interval = interval
+        self.lock = threading.Lock()
+        self.deadline = None          # None — профайлер выключен
+        self.fraction = 1.0
+        self.interval = interval
+        self.started_at = None
+        self.tracked = {}             # id потока → эндпоинт профилируемого запроса
+        self.samples = defaultdict(Counter)
+        self.requests = Counter()
+        self.last_files = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __call__(self, environ, start_response):
+        if self.deadline is None:
+            return self.app(environ, start_response)
+        if self.fraction < 1.0 and random.random() >= self.fraction:
+            return self.app(environ, start_response)
+
+        endpoint = self._endpoint(environ)
+        thread_id = threading.get_ident()
+        with self.lock:
+            self.tracked[thread_id] = endpoint
+            self.requests[endpoint] += 1
+
+        def untrack():
+            with self.lock:
+                self.tracked.pop(thread_id, None)
+
+        try:
+            result = self.app(environ, start_response)
+        except BaseException:
+            untrack()
+            raise
+        # Потоковые ответы генерируются при итерации в этом же потоке — снимаем
+        # отметку только после close(), который сервер вызывает в конце ответа
+        return ClosingIterator(result, untrack)
+
+    def _endpoint(self, environ):
+        try:
+            endpoint, _ = self.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            endpoint = "unmatched"
+        return endpoint
+
+    # - Управление -
+
+    def start(self, seconds=30.0, fraction=1.0, interval=None):
+        """Включает профилирование; повторный вызов продлевает текущий сеанс"""
+        with self.lock:
+            if self.deadline is not None:
+                self.fraction = max(0.0, min(1.0, float(fraction)))
+                self.deadline = time.monotonic() + float(seconds)
+                return self.status()
+        # Предыдущий сеанс мог ещё дописывать результаты
+        if self._thread is not None:
+            self._thread.join()
+        with self.lock:
+            self.fraction = max(0.0, min(1.0, float(fraction)))
+            self.interval = float(interval or self.default_interval)
+            self.deadline = time.monotonic() + float(seconds)
+            self.samples = defaultdict(Counter)
+            self.requests = Counter()
+            self.started_at = time.strftime("%Y%m%d-%H%M%S")
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+            self._thread.start()
+            return self.status()
+
+    def stop(self):
+        """Досрочно завершает сеанс и ждёт записи результатов"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=10)
+        return self.status()
+
+    def status(self):
+        deadline = self.deadline
+        return {
+            "active": deadline is not None,
+            "seconds_left": round(max(0.0, deadline - time.monotonic()), 1) if deadline is not None else 0,
+            "fraction": self.fraction,
+            "interval": self.interval,
+            "requests": dict(self.requests),
+            "samples": {endpoint: sum(stacks.values()) for endpoint, stacks in self.samples.items()},
+            "output_dir": self.output_dir,
+            "last_files": list(self.last_files),
+        }
+
+    def install_signal(self, signame="SIGUSR2", seconds=30.0):
+        """Сигнал включает профилирование процесса на seconds секунд (повторный — выключает)"""
+        signum = getattr(signal, signame, None)
+        if signum is None or threading.current_thread() is not threading.main_thread():
+            return False
+
+        def handler(_signum, _frame):
+            # Обработчик сигнала не должен ждать блокировку — работу делает отдельный поток
+            action = self.stop if self.deadline is not None else lambda: self.start(seconds)
+            threading.Thread(target=action, name="profiler-signal", daemon=True).start()
+
+        signal.signal(signum, handler)
+        return True
+
+    # - Сбор стеков -
+
+    def _sample_loop(self):
+        try:
+            while not self._stop.wait(self.interval):
+                frames = sys._current_frames()
+                with self.lock:
+                    if time.monotonic() >= self.deadline:
+                        break
+                    tracked = list(self.tracked.items())
+                for thread_id, endpoint in tracked:
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        self.samples[endpoint][collapse_stack(frame)] += 1
+                del frames
+        finally:
+            with self.lock:
+                self.deadline = None
+                self.tracked.clear()
+            self._write_results()
+
+    def _write_results(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        files = []
+        for endpoint, stacks in self.samples.items():
+            safe = re.sub(r"[^\w.-]+", "_", endpoint)
+            path = os.path.join(self.output_dir, f"{self.started_at}_{os.getpid()}_{safe}.collapsed")
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            files.append(path)
+        self.last_files = files
+
+def collapse_stack(frame):
+    """Стек от корня к листу: 'функция (файл:строка);...'"""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
@@ -0,0 +1,94 @@
+# utils/question_classes.py
+"""Классы вопросов для GPT и параметры ответа для каждого класса.
+
+Приветствию не нужен ответ на 1000 токенов и весь диалог в промпте, а
+вопросу о дне рождения они могут понадобиться. QuestionClassifier
+относит вопрос к одному из классов:
+
+- greeting — приветствие, благодарность, прощание;
+- event    — праздники и бронирование (правила и категория меню events);
+- factual  — короткий вопрос о цене, времени, адресе или аттракционе
+             (правила и остальные категории меню);
+- general  — всё остальное.
+
+Ключевые слова категорий берутся из пунктов меню (название, вопрос,
+тема подсказок) и сравниваются по основам слов, как в utils/retrieval.
+
+У каждого класса свой профиль: maxTokens, модель и сколько последних
+сообщений диалога передавать в GPT. Значения по умолчанию — в
+DEFAULT_PROFILES; переменные окружения GPT_<КЛАСС>_MAX_TOKENS,
+GPT_<КЛАСС>_MODEL и GPT_<КЛАСС>_HISTORY их переопределяют
+(например, GPT_EVENT_MODEL=yandexgpt).
+"""
+import os
+
+from utils.normalize import normalize_question
+from utils.retrieval import tokenize
+
+GREETING = "greeting"
+EVENT = "event"
+FACTUAL = "factual"
+GENERAL = "general"
+QUESTION_CLASSES = (GREETING, EVENT, FACTUAL, GENERAL)
+
+# history — сколько последних сообщений диалога (вопросов и ответов) передавать в GPT
+DEFAULT_PROFILES = {
+    GREETING: {"max_tokens": 150, "model": "yandexgpt-lite", "history": 0},
+    FACTUAL: {"max_tokens": 400, "model": "yandexgpt-lite", "history": 2},
+    EVENT: {"max_tokens": 1000, "model": "yandexgpt-lite", "history": 8},
+    GENERAL: {"max_tokens": 700, "model": "yandexgpt-lite", "history": 4},
+}
+
+GREETING_WORDS = frozenset(
+    "привет приветик здравствуйте здравствуй здрасте добрый доброе день вечер утро хай hello hi "
+    "спасибо благодарю пока свидания до ок окей хорошо понятно ясно отлично".split()
+)
+# Начала слов — признаки класса независимо от меню
+EVENT_PREFIXES = tuple("праздн рожд днюх выпуск корпоратив банкет мероприят брон заброн заказ запис аниматор".split())
+FACTUAL_PREFIXES = tuple("скольк стоит стоим цен прайс адрес где когда время час работа телефон скидк".split())
+# Короткий вопрос — не длиннее стольких слов
+FACTUAL_MAX_WORDS = 7
+
+def load_profiles(environ=os.environ):
+    """Профили классов с учётом переменных окружения GPT_<КЛАСС>_*"""
+    profiles = {}
+    for name, defaults in DEFAULT_PROFILES.items():
+        prefix = f"GPT_{name.upper()}_"
+        profiles[name] = {
+            "max_tokens": int(environ.get(prefix + "MAX_TOKENS", defaults["max_tokens"])),
+            "model": environ.get(prefix + "MODEL", defaults["model"]),
+            "history": int(environ.get(prefix + "HISTORY", defaults["history"])),
+        }
+    return profiles
+
+class QuestionClassifier:
+    """classifier = QuestionClassifier(пункты меню); classifier.classify("сколько стоит vr") → factual"""
+
+    def __init__(self, menu_items=()):
+        self.keywords = {}        # основа слова → класс по категории пункта меню
+        for item in menu_items:
+            question_class = EVENT if item.get("category") == "events" else FACTUAL
+            topic = item.get("suggestion_topic")
+            text = " ".join(filter(None, (item.get("admin_text"), item.get("question"),
+                                          topic if topic != "default" else None)))
+            for stem in tokenize(text):
+                # "день" из "День рождения" не должен делать праздником "добрый день"
+                if stem in GREETING_WORDS:
+                    continue
+                # Слово из праздничного пункта меню важнее того же слова в другом пункте
+                if self.keywords.get(stem) != EVENT:
+                    self.keywords[stem] = question_class
+
+    def classify(self, question):
+        words = normalize_question(question).split()
+        if not words:
+            return GENERAL
+        if len(words) <= 4 and all(word in GREETING_WORDS for word in words):
+            return GREETING
+        menu_classes = {self.keywords.get(stem) for stem in tokenize(question)}
+        if EVENT in menu_classes or any(word.startswith(EVENT_PREFIXES) for word in words):
+            return EVENT
+        if len(words) <= FACTUAL_MAX_WORDS and (
+                FACTUAL in menu_classes or any(word.startswith(FACTUAL_PREFIXES) for word in words)):
+            return FACTUAL
+        return GENERAL
@@ -0,0 +1,97 @@
+# utils/retrieval.py
+"""Поиск записей базы знаний для подсказки GPT (BM25 по словам).
+
+BM25Index строится из пар "вопрос — ответ" (база знаний и подсказки).
+search() находит самые близкие к вопросу посетителя записи. build_context()
+собирает из них справку для системного промпта: не больше k записей и
+не больше max_chars символов. Так GPT отвечает по нашим данным, а промпт
+остаётся коротким.
+
+Слова приводятся к грубой основе (первые STEM_LENGTH букв), чтобы
+"праздник" и "праздника" совпадали; служебные слова отбрасываются.
+Индекс сериализуется в простые типы (to_payload) и хранится в бинарном
+снимке данных рядом с базой знаний.
+"""
+import math
+from collections import Counter
+
+from utils.normalize import normalize_question
+
+STEM_LENGTH = 5
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOP_WORDS = frozenset(
+    "а и в во на не ни что как где когда ли же бы у к ко от до из за по про при о об с со "
+    "для это этот эта то та там тут мне меня мы вы вас вам ты я он она они есть будет можно "
+    "ваш ваши наш еще уже или но да нет ну".split()
+)
+
+def compact(text):
+    """Убирает лишние пробелы и пустые строки: в промпте они стоят токенов"""
+    return "\n".join(" ".join(line.split()) for line in text.splitlines() if line.strip())
+
+def tokenize(text):
+    """Слова текста в виде основ без служебных слов"""
+    return [word[:STEM_LENGTH] for word in normalize_question(text).split() if word not in STOP_WORDS]
+
+class BM25Index:
+    """index = BM25Index.build([(вопрос, ответ), ...]); index.search("сколько стоит vr")"""
+
+    def __init__(self, entries, postings, doc_lengths):
+        self.entries = entries            # [(вопрос, ответ), ...]
+        self.postings = postings          # основа → [(номер записи, частота), ...]
+        self.doc_lengths = doc_lengths
+        count = len(doc_lengths)
+        self.avg_length = (sum(doc_lengths) / count) if count else 1.0
+        self.idf = {
+            term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in postings.items()
+        }
+
+    @classmethod
+    def build(cls, entries):
+        """Индекс по парам (вопрос, ответ); вопрос весит вдвое больше ответа"""
+        postings = {}
+        doc_lengths = []
+        for doc_id, (question, answer) in enumerate(entries):
+            terms = tokenize(question) * 2 + tokenize(answer)
+            doc_lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                postings.setdefault(term, []).append((doc_id, tf))
+        return cls(list(entries), postings, doc_lengths)
+
+    def search(self, query, k=4):
+        """До k записей по убыванию релевантности: [(оценка, вопрос, ответ), ...]"""
+        scores = Counter()
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return [(score, *self.entries[doc_id]) for doc_id, score in scores.most_common(k)]
+
+    def to_payload(self):
+        """Простые типы для бинарного снимка (marshal)"""
+        return {"entries": self.entries, "postings": self.postings, "doc_lengths": self.doc_lengths}
+
+    @classmethod
+    def from_payload(cls, payload):
+        return cls(payload["entries"], payload["postings"], payload["doc_lengths"])
+
+def build_context(index, query, k=4, max_chars=1500):
+    """Справка для промпта из найденных записей; пустая строка — ничего не нашлось"""
+    parts = []
+    used = 0
+    for _score, question, answer in index.search(query, k):
+        part = f"Вопрос: {question}\nОтвет: {compact(answer)}"
+        if used + len(part) > max_chars:
+            if parts:
+                break
+            # Даже одна запись не помещается — берём её начало
+            part = part[:max_chars]
+        parts.append(part)
+        used += len(part) + 2
+    return "\n\n".join(parts)
@@ -0,0 +1,98 @@
+# utils/similar_questions.py
+"""Похожие вопросы с готовыми ответами («Возможно, вы имели в виду»).
+
+Когда на вопрос нет готового ответа и он уходит в GPT, посетителю
+предлагаются до k известных вопросов, ближе всего совпадающих с его
+вопросом по буквенным n-граммам. Нажатие на такую подсказку даёт ответ
+сразу, без GPT.
+
+Вопросы базы знаний и подсказок разбиваются на n-граммы символов
+(по умолчанию триграммы с пробелами по краям слов) и взвешиваются по
+TF-IDF. Строки матрицы нормированы, поэтому косинусная близость ко всем
+вопросам считается одним умножением матрицы на вектор. Для этого нужен
+NumPy; без него поиск отключён (available = False) и closest() пуст.
+NumPy импортируется при построении матрицы, а не при импорте модуля,
+чтобы не замедлять старт воркера.
+"""
+import math
+from collections import Counter
+
+from utils.normalize import normalize_question
+
+NGRAM_SIZE = 3
+
+def char_ngrams(text, n=NGRAM_SIZE):
+    """Буквенные n-граммы нормализованного текста: "vr зона" → " vr", "vr ", " зо", ..."""
+    grams = []
+    for word in normalize_question(text).split():
+        padded = f" {word} "
+        grams.extend(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+    return grams
+
+class SimilarQuestions:
+    """similar = SimilarQuestions([(текст, вопрос, ответ), ...]); similar.closest("сколько стоит батут")"""
+
+    def __init__(self, entries, min_score=0.3):
+        self.entries = []         # [(текст подсказки, вопрос, ответ), ...] — строки матрицы
+        self.min_score = min_score
+        self.vocabulary = {}      # n-грамма → столбец
+        self.idf = None
+        self.matrix = None
+        try:
+            import numpy as np  # ленивый импорт: матрица строится только при загрузке данных
+        except ImportError:
+            np = None
+        self.np = np
+        self.available = np is not None
+        if not self.available:
+            return
+
+        seen = set()
+        counts = []
+        for text, question, answer in entries:
+            key = normalize_question(question)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            self.entries.append((text, question, answer))
+            counts.append(Counter(char_ngrams(question)))
+        for grams in counts:
+            for gram in grams:
+                self.vocabulary.setdefault(gram, len(self.vocabulary))
+
+        document_frequency = np.zeros(len(self.vocabulary), dtype=np.float32)
+        matrix = np.zeros((len(counts), len(self.vocabulary)), dtype=np.float32)
+        for row, grams in enumerate(counts):
+            for gram, count in grams.items():
+                column = self.vocabulary[gram]
+                matrix[row, column] = 1 + math.log(count)
+                document_frequency[column] += 1
+        self.idf = np.log((1 + len(counts)) / (1 + document_frequency)) + 1
+        self.matrix = self._normalize_rows(matrix * self.idf)
+
+    def _normalize_rows(self, matrix):
+        np = self.np
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1
+        return matrix / norms
+
+    def vector(self, text):
+        """TF-IDF вектор текста в пространстве n-грамм индекса (незнакомые n-граммы не учитываются)"""
+        np = self.np
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for gram, count in Counter(char_ngrams(text)).items():
+            column = self.vocabulary.get(gram)
+            if column is not None:
+                vector[column] = 1 + math.log(count)
+        return self._normalize_rows(vector * self.idf)
+
+    def closest(self, text, k=3):
+        """До k записей с близостью не ниже min_score: [(близость, текст, вопрос, ответ), ...]"""
+        if not self.available or not self.entries:
+            return []
+        np = self.np
+        scores = self.matrix @ self.vector(text)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[row]), *self.entries[row]) for row in top if scores[row] >= self.min_score]
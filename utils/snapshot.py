@@ -0,0 +1,95 @@
+# utils/snapshot.py
+"""Бинарный снимок данных бота для быстрого холодного старта.
+
+Формат файла:
+    MAGIC (8 байт) | длина заголовка (4 байта, big-endian) | заголовок JSON | payload (marshal)
+
+В заголовке хранятся версия схемы, версия marshal и отпечатки исходных
+JSON-файлов (размер, mtime, sha1). Если хоть один источник изменился,
+снимок считается устаревшим и приложение читает JSON.
+"""
+import hashlib
+import json
+import marshal
+import os
+import struct
+from datetime import datetime
+
+SNAPSHOT_MAGIC = b"DSPSNAP\x01"
+SNAPSHOT_SCHEMA = 2
+_HEADER_LEN = struct.Struct(">I")
+
+def file_fingerprint(path, with_hash=True):
+    """Отпечаток файла: размер, время изменения и (опционально) sha1 содержимого"""
+    st = os.stat(path)
+    fingerprint = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if with_hash:
+        with open(path, "rb") as f:
+            fingerprint["sha1"] = hashlib.sha1(f.read()).hexdigest()
+    return fingerprint
+
+def _source_is_fresh(path, expected):
+    """Быстрая проверка по размеру и mtime, затем по sha1 (mtime меняется при деплое)"""
+    try:
+        current = file_fingerprint(path, with_hash=False)
+    except OSError:
+        return False
+    if current["size"] != expected.get("size"):
+        return False
+    if current["mtime_ns"] == expected.get("mtime_ns"):
+        return True
+    return file_fingerprint(path)["sha1"] == expected.get("sha1")
+
+def write_snapshot(path, payload, sources):
+    """Атомарно записывает снимок; sources — {имя: путь к исходному JSON}"""
+    header = {
+        "schema": SNAPSHOT_SCHEMA,
+        "marshal_version": marshal.version,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "sources": {name: dict(file_fingerprint(p), path=p) for name, p in sources.items()},
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    body = marshal.dumps(payload)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(_HEADER_LEN.pack(len(header_bytes)))
+        f.write(header_bytes)
+        f.write(body)
+    os.replace(tmp_path, path)
+    return header
+
+def read_snapshot(path, sources):
+    """Читает снимок одним read(); возвращает (payload, None) или (None, причина)"""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None, "файл снимка отсутствует"
+
+    if raw[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        return None, "неизвестный формат"
+    offset = len(SNAPSHOT_MAGIC)
+    (header_len,) = _HEADER_LEN.unpack_from(raw, offset)
+    offset += _HEADER_LEN.size
+    try:
+        header = json.loads(raw[offset:offset + header_len].decode("utf-8"))
+    except ValueError:
+        return None, "повреждён заголовок"
+
+    if header.get("schema") != SNAPSHOT_SCHEMA:
+        return None, f"версия схемы {header.get('schema')} != {SNAPSHOT_SCHEMA}"
+    if header.get("marshal_version") != marshal.version:
+        return None, "другая версия marshal"
+
+    recorded = header.get("sources", {})
+    for name, source_path in sources.items():
+        if name not in recorded or not _source_is_fresh(source_path, recorded[name]):
+            return None, f"устарел источник {source_path}"
+
+    try:
+        payload = marshal.loads(raw[offset + header_len:])
+    except (EOFError, ValueError, TypeError):
+        return None, "повреждены данные"
+    return payload, None
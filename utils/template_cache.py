@@ -0,0 +1,38 @@
+# utils/template_cache.py
+"""Кэш байткода шаблонов Jinja на диске.
+
+Скомпилированные шаблоны сохраняются в каталог, и новые воркеры берут их
+оттуда вместо повторной компиляции. precompile_templates.py заполняет
+кэш при сборке. Если каталог недоступен для записи (например, на Vercel),
+шаблоны просто компилируются в памяти, как без кэша.
+"""
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+class SafeBytecodeCache(FileSystemBytecodeCache):
+    """FileSystemBytecodeCache, который не роняет рендер при ошибке записи"""
+
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+def bytecode_cache(directory):
+    """Кэш в directory (каталог создаётся при необходимости)"""
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        pass
+    return SafeBytecodeCache(directory)
+
+def precompile(jinja_env, names):
+    """Компилирует шаблоны (байткод попадает в кэш окружения); возвращает {имя: ошибка}"""
+    errors = {}
+    for name in names:
+        try:
+            jinja_env.get_template(name)
+        except Exception as e:
+            errors[name] = str(e)
+    return errors
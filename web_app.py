@@ -1,41 +1,50 @@
 # web_app.py
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, send_from_directory, abort, make_response
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, send_from_directory, abort, make_response, g, Response, after_this_request, has_request_context
 import os
 import json
 import time
 import shutil
 from datetime import datetime
 from dotenv import load_dotenv
-import requests
 import socket
 import logging
 import re
 import functools
-
-# - Настройка логирования -
-logging.basicConfig(filename='audit.log',
-                    level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+import hashlib
+import threading
+import uuid
+from config import get_config
+from utils.snapshot import read_snapshot, write_snapshot
+from utils.metrics import REGISTRY as METRICS
+from utils.log_setup import configure_logging
+from utils.profiler import SamplingProfiler
+from utils.assets import init_app as init_assets, send_asset
+from utils.compression import init_app as init_compression, etag_variants
+from utils.template_cache import bytecode_cache
+from utils.normalize import normalize_question, QueryCorrector
+from utils.conversation import ConversationStore
+from utils.circuit_breaker import CircuitBreaker
+from utils.bounded_executor import BoundedExecutor, ExecutorOverloaded
+from utils.retrieval import BM25Index, build_context
+from utils.learned_answers import LearnedAnswers
+from utils.similar_questions import SimilarQuestions
+from utils.question_classes import QuestionClassifier, load_profiles
+from utils.hedging import HedgedCaller
+from utils.json_files import write_json, update_json
+
+# - Логирование (настраивается в create_app) -
+log = logging.getLogger(__name__)
 
 # - Загрузка переменных окружения -
 load_dotenv()
 
-# - Создание приложения -
-app = Flask(__name__)
-app.secret_key = os.getenv("FLASK_SECRET_KEY", "super-secret-key-for-d-space-bot")
-
-# - ОТКЛЮЧЕНИЕ КЭШИРОВАНИАЯ -
-app.config['TEMPLATES_AUTO_RELOAD'] = True
-app.jinja_env.auto_reload = True
-app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
-
 # - Глобальные переменные -
 KNOWLEDGE_BASE = {}
 BOOKINGS = []
-conversation_history = {}
+# Последние реплики посетителей для уточняющих вопросов к GPT (см. utils/conversation.py)
+CONVERSATIONS = ConversationStore()
 LOG_FILE = "bot_log.json"
 BACKUPS_DIR = "backups"
-os.makedirs(BACKUPS_DIR, exist_ok=True)
 
 # - Пути -
 KNOWLEDGE_FILE = "knowledge_base.json"
@@ -43,26 +52,292 @@ BOOKINGS_FILE = "bookings.json"
 SUGGESTIONS_FILE = "suggestions.json"
 MENU_FILE = "menu.json"
 MENU_CATEGORIES_FILE = "menu_categories.json"
+# Ответы GPT на частые вопросы, ждущие проверки (pregenerate_answers.py → /admin/candidates)
+CANDIDATES_FILE = "answer_candidates.json"
+# Ответы GPT с хорошими оценками посетителей (см. utils/learned_answers.py)
+LEARNED_ANSWERS_FILE = os.getenv("LEARNED_ANSWERS_FILE", "learned_answers.json")
+SNAPSHOT_FILE = os.getenv("SNAPSHOT_FILE", "knowledge_snapshot.bin")
+SNAPSHOT_AUTO_REBUILD = os.getenv("SNAPSHOT_AUTO_REBUILD", "true").lower() == "true"
+
+# Исходные JSON, из которых собирается бинарный снимок
+SNAPSHOT_SOURCES = {
+    "knowledge_base": KNOWLEDGE_FILE,
+    "suggestions": SUGGESTIONS_FILE,
+    "menu": MENU_FILE
+}
+
+# Ответ GPT выдаётся без обращения к GPT после LEARNED_MIN_GOOD хороших оценок и ни одной плохой;
+# через LEARNED_TTL_DAYS дней вопрос снова уходит в GPT
+LEARNED = LearnedAnswers(
+    LEARNED_ANSWERS_FILE,
+    min_good=int(os.getenv("LEARNED_MIN_GOOD", "3")),
+    ttl=float(os.getenv("LEARNED_TTL_DAYS", "30")) * 86400
+)
+
+# - Yandex GPT -
+# Базовый URL можно переопределить, например на локальную заглушку yandex_gpt_stub.py
+YANDEX_GPT_BASE_URL = os.getenv("YANDEX_GPT_BASE_URL", "https://llm.api.cloud.yandex.net").rstrip("/")
+# Общий бюджет времени на один ответ GPT со всеми повторами и лимит одной попытки
+GPT_DEADLINE_SECONDS = float(os.getenv("GPT_DEADLINE_SECONDS", "12"))
+GPT_ATTEMPT_TIMEOUT = float(os.getenv("GPT_ATTEMPT_TIMEOUT", "10"))
+GPT_MAX_ATTEMPTS = int(os.getenv("GPT_MAX_ATTEMPTS", "3"))
+GPT_RETRY_DELAY = float(os.getenv("GPT_RETRY_DELAY", "1"))
+# Попытку короче этого не начинаем: ответ всё равно не успеет прийти
+GPT_MIN_ATTEMPT_SECONDS = 0.5
+# Автомат защиты: при доле ошибок GPT_CIRCUIT_FAILURE_RATIO за GPT_CIRCUIT_WINDOW секунд
+# вызовы GPT отклоняются сразу на GPT_CIRCUIT_OPEN_SECONDS секунд
+GPT_CIRCUIT = CircuitBreaker(
+    "yandex_gpt",
+    window_seconds=float(os.getenv("GPT_CIRCUIT_WINDOW", "60")),
+    min_calls=int(os.getenv("GPT_CIRCUIT_MIN_CALLS", "5")),
+    failure_ratio=float(os.getenv("GPT_CIRCUIT_FAILURE_RATIO", "0.5")),
+    open_seconds=float(os.getenv("GPT_CIRCUIT_OPEN_SECONDS", "30"))
+)
+GPT_FALLBACK_ANSWER = os.getenv(
+    "GPT_FALLBACK_ANSWER",
+    "😔 Сейчас не получается ответить на этот вопрос.\n\n"
+    "📞 Позвоните нам: +7 (967) 061-08-61 (Пн–Вс: с 10:00 до 22:00) — администратор всё подскажет!"
+)
+
+# Вызовы GPT выполняются в отдельном пуле: не больше GPT_WORKERS одновременно и
+# GPT_MAX_QUEUE в очереди, ждать свободного потока не дольше GPT_MAX_QUEUE_WAIT секунд.
+# Остальные потоки воркера тем временем обслуживают быстрые запросы
+GPT_EXECUTOR = BoundedExecutor(
+    "gpt",
+    max_workers=int(os.getenv("GPT_WORKERS", "4")),
+    max_queue=int(os.getenv("GPT_MAX_QUEUE", "4")),
+    max_wait=float(os.getenv("GPT_MAX_QUEUE_WAIT", "2"))
+)
+# Дублирующий запрос, если попытка GPT дольше GPT_HEDGE_PERCENTILE-го перцентиля (выключено по умолчанию)
+GPT_HEDGE_ENABLED = os.getenv("GPT_HEDGE_ENABLED", "false").lower() == "true"
+GPT_HEDGER = HedgedCaller(
+    "gpt",
+    percentile=float(os.getenv("GPT_HEDGE_PERCENTILE", "95")),
+    min_samples=int(os.getenv("GPT_HEDGE_MIN_SAMPLES", "20")),
+    max_ratio=float(os.getenv("GPT_HEDGE_MAX_RATIO", "0.05")),
+    max_workers=2 * GPT_EXECUTOR.max_workers
+)
+GPT_BUSY_ANSWER = os.getenv(
+    "GPT_BUSY_ANSWER",
+    "⏳ Сейчас очень много вопросов — попробуйте спросить ещё раз через минуту.\n\n"
+    "📞 Или позвоните нам: +7 (967) 061-08-61 (Пн–Вс: с 10:00 до 22:00)"
+)
+
+# Справка из базы знаний в промпте: сколько записей и сколько символов максимум
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "4"))
+RAG_MAX_CHARS = int(os.getenv("RAG_MAX_CHARS", "1500"))
+# Параметры ответа GPT по классу вопроса: maxTokens, модель, глубина истории (GPT_<КЛАСС>_*)
+GPT_PROFILES = load_profiles()
+GPT_TEMPERATURE = float(os.getenv("GPT_TEMPERATURE", "0.3"))
+
+# «Возможно, вы имели в виду»: сколько похожих вопросов предлагать и минимальная близость (0–1)
+SIMILAR_TOP_K = int(os.getenv("SIMILAR_TOP_K", "3"))
+SIMILAR_MIN_SCORE = float(os.getenv("SIMILAR_MIN_SCORE", "0.3"))
+
+GPT_SYSTEM_PROMPT = """Ты – дружелюбный консультант D-Space. Отвечай кратко, структурированно, с эмодзи.
+Опирайся только на сведения из раздела «Справка D-Space» ниже.
+Не выдумывай цены, пакеты, акции и даты: если в справке этого нет, честно скажи и предложи связаться с администратором.
+Если пользователь хочет заказать праздник, уточни количество гостей, дату и тематику и предложи забронировать время.
+Всегда завершай свой ответ открытым вопросом, чтобы продолжить диалог."""
+
+class GPTUnavailableError(Exception):
+    """GPT не ответил: автомат защиты открыт, исчерпан бюджет времени или все попытки,
+    либо пул вызовов GPT перегружен (reason: queue_full / wait_timeout)"""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+    @property
+    def answer(self):
+        """Ответ посетителю вместо ответа GPT"""
+        if self.reason in ("queue_full", "wait_timeout"):
+            return GPT_BUSY_ANSWER
+        return GPT_FALLBACK_ANSWER
+
+# - Профилирование (/admin/profiler, сигнал PROFILE_SIGNAL) -
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SIGNAL = os.getenv("PROFILE_SIGNAL", "SIGUSR2")
+PROFILE_SIGNAL_SECONDS = float(os.getenv("PROFILE_SIGNAL_SECONDS", "30"))
+
+# - Условное кэширование API (ETag / 304) -
+# Сколько секунд клиент может не перепроверять ответ; 0 — перепроверять каждый раз
+API_CACHE_MAX_AGE = int(os.getenv("API_CACHE_MAX_AGE", "0"))
 
 # - Константы системных категорий меню -
 SYSTEM_CATEGORIES = ['attractions', 'events', 'services', 'info']
 
+# - Метрики (/metrics) -
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+HTTP_SECONDS = METRICS.histogram("dspace_http_request_seconds", "Длительность обработки HTTP-запроса", ["endpoint"])
+CHAT_STAGE_SECONDS = METRICS.histogram("dspace_chat_stage_seconds", "Длительность этапов обработки /chat и /ask", ["stage"])
+CHAT_RESPONSES = METRICS.counter("dspace_chat_responses_total", "Ответы чата по источнику", ["endpoint", "source"])
+GPT_ATTEMPT_SECONDS = METRICS.histogram("dspace_gpt_attempt_seconds", "Длительность одной попытки вызова Yandex GPT", ["outcome"])
+GPT_RETRIES = METRICS.counter("dspace_gpt_retries_total", "Повторные попытки вызова Yandex GPT")
+GPT_UNAVAILABLE = METRICS.counter("dspace_gpt_unavailable_total", "Вопросы, на которые GPT не ответил", ["reason"])
+GPT_QUESTIONS = METRICS.counter("dspace_gpt_questions_total", "Вопросы к GPT по классу", ["question_class"])
+GPT_ANSWER_SECONDS = METRICS.histogram("dspace_gpt_answer_seconds", "Время получения ответа GPT по классу вопроса", ["question_class"])
+GPT_TOKENS = METRICS.counter("dspace_gpt_tokens_total", "Токены Yandex GPT по классу вопроса", ["question_class", "kind"])
+STORAGE_SECONDS = METRICS.histogram("dspace_storage_seconds", "Длительность загрузки и сохранения файлов данных", ["op"])
+CACHE_LOOKUPS = METRICS.counter("dspace_cache_lookups_total", "Обращения к кэшам", ["cache", "result"])
+BYTES_WRITTEN = METRICS.counter("dspace_bytes_written_total", "Байт записано в файлы данных", ["file"])
+
 # - Глобальная переменная -
 suggestionMap = {}
 MENU_CACHE = None
+MENU_TOPIC_INDEX = {}
+SUGGESTION_INDEX = {}
+# Нормализованный вопрос → ключ базы знаний; строится при первом промахе точного поиска
+KNOWLEDGE_NORMALIZED_INDEX = None
+# BM25-индекс базы знаний и подсказок для справки в промпте GPT (см. retrieval_index)
+RETRIEVAL_INDEX = None
+# Исправление раскладки, транслита и опечаток по словам известных вопросов (см. correct_question)
+QUERY_CORRECTOR = None
+# TF-IDF по буквенным n-граммам вопросов с ответами (см. similar_questions)
+SIMILAR_QUESTIONS = None
+# Классификатор вопросов к GPT по ключевым словам меню (см. question_classifier)
+QUESTION_CLASSIFIER = None
+# Версии данных (хэш содержимого) для ETag; сбрасываются при изменении данных
+# и пересчитываются при первом обращении (см. data_version)
+DATA_VERSIONS = {}
+# Версии, которые зависят от других наборов данных и сбрасываются при любом изменении
+DERIVED_VERSIONS = ("bootstrap", "knowledge_export")
+BOOTSTRAP_CACHE = None
+KNOWLEDGE_EXPORT_CACHE = None
+
+# - Ленивая инициализация данных -
+_data_lock = threading.Lock()
+_data_loaded = False
+
+def ensure_data_loaded():
+    """Загружает данные при первом обращении (один раз на процесс)"""
+    global _data_loaded
+    if _data_loaded:
+        return
+    with _data_lock:
+        if _data_loaded:
+            return
+        os.makedirs(BACKUPS_DIR, exist_ok=True)
+        snapshot_loaded = load_snapshot()
+        CACHE_LOOKUPS.inc(cache="snapshot", result="hit" if snapshot_loaded else "miss")
+        if not snapshot_loaded:
+            load_knowledge_base()
+            load_suggestion_map()
+            load_menu()
+            # На файловой системе только для чтения (Vercel) пересборка лишь тратила бы время старта
+            if SNAPSHOT_AUTO_REBUILD and snapshot_writable():
+                save_snapshot()
+        load_bookings()
+        similar_questions()
+        _data_loaded = True
 
-# - Декоратор для отключения кэширования -
-def no_cache(view):
-    @functools.wraps(view)
-    def no_cache_view(*args, **kwargs):
-        response = make_response(view(*args, **kwargs))
-        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
-        return response
-    return no_cache_view
+# - Создание приложения -
+def create_app():
+    """Фабрика приложения: только конфигурация, данные загружаются при первом запросе"""
+    configure_logging()
+    # Встроенный маршрут /static отключён — статику отдаёт send_static
+    flask_app = Flask(__name__, static_folder=None)
+
+    # - Профиль конфигурации (APP_ENV) -
+    config = get_config()
+    flask_app.config.from_object(config)
+    # Окружение Jinja создаётся при первом обращении — кэш байткода задаём до него
+    if config.JINJA_BYTECODE_CACHE_DIR:
+        flask_app.jinja_options = dict(flask_app.jinja_options,
+                                       bytecode_cache=bytecode_cache(config.JINJA_BYTECODE_CACHE_DIR))
+
+    # Статика с хэшами (python build_assets.py) и asset_url() в шаблонах
+    init_assets(flask_app, "static")
+
+    flask_app.before_request(start_request_timer)
+    flask_app.before_request(ensure_data_loaded)
+    flask_app.after_request(observe_request_time)
+    # after_request вызываются в обратном порядке: сжатие попадает в замер времени
+    init_compression(flask_app)
+
+    # Профайлер оборачивает WSGI-приложение и выключен, пока его не включат
+    profiler = SamplingProfiler(flask_app.wsgi_app, flask_app.url_map, PROFILE_DIR)
+    flask_app.wsgi_app = profiler
+    flask_app.extensions["profiler"] = profiler
+    if PROFILE_SIGNAL:
+        profiler.install_signal(PROFILE_SIGNAL, PROFILE_SIGNAL_SECONDS)
+    return flask_app
+
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+def observe_request_time(response):
+    """Учитывает длительность запроса в гистограмме по эндпоинту"""
+    started = g.get("request_started")
+    if started is not None:
+        HTTP_SECONDS.observe(time.perf_counter() - started, endpoint=request.endpoint or "unknown")
+    return response
+
+app = create_app()
+
+# - Декоратор условного кэширования -
+def cache_by_version(*data_names):
+    """ETag из версий данных: при совпадении If-None-Match ответ 304 без вызова view"""
+    def decorator(view):
+        @functools.wraps(view)
+        def cached_view(*args, **kwargs):
+            etag = "-".join(data_version(name) for name in data_names)
+            # После сжатия у тега есть суффикс кодировки — сравниваем со всеми вариантами
+            matched = next((tag for tag in etag_variants(etag) if request.if_none_match.contains(tag)), None)
+            if matched:
+                CACHE_LOOKUPS.inc(cache="http_etag", result="hit")
+                response = app.response_class(status=304)
+                response.set_etag(matched)
+            else:
+                CACHE_LOOKUPS.inc(cache="http_etag", result="miss")
+                response = make_response(view(*args, **kwargs))
+                response.set_etag(etag)
+            if API_CACHE_MAX_AGE > 0:
+                response.headers['Cache-Control'] = f'max-age={API_CACHE_MAX_AGE}, must-revalidate'
+            else:
+                response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return cached_view
+    return decorator
 
 # - Вспомогательные функции -
+def content_version(data):
+    """Короткий хэш содержимого — одинаковый во всех воркерах с одинаковыми данными"""
+    raw = json.dumps(data, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+def data_version(name):
+    """Версия набора данных: menu, suggestions, knowledge_base, categories или bootstrap"""
+    version = DATA_VERSIONS.get(name)
+    if version is None:
+        version = DATA_VERSIONS[name] = content_version(DATA_SOURCES[name]())
+    return version
+
+def invalidate_data_version(*names):
+    """Сбрасывает версии изменившихся данных и всё, что из них построено"""
+    global BOOTSTRAP_CACHE, KNOWLEDGE_EXPORT_CACHE, KNOWLEDGE_NORMALIZED_INDEX, RETRIEVAL_INDEX, QUERY_CORRECTOR
+    global SIMILAR_QUESTIONS, QUESTION_CLASSIFIER
+    for name in names + DERIVED_VERSIONS:
+        DATA_VERSIONS.pop(name, None)
+    BOOTSTRAP_CACHE = None
+    KNOWLEDGE_EXPORT_CACHE = None
+    if "knowledge_base" in names:
+        KNOWLEDGE_NORMALIZED_INDEX = None
+    if "knowledge_base" in names or "suggestions" in names:
+        RETRIEVAL_INDEX = None
+        QUERY_CORRECTOR = None
+        SIMILAR_QUESTIONS = None
+    if "menu" in names:
+        QUESTION_CLASSIFIER = None
+
+def record_write(path):
+    """Учитывает объём записанного файла в метриках"""
+    try:
+        BYTES_WRITTEN.inc(os.path.getsize(path), file=os.path.basename(path))
+    except OSError:
+        pass
+
+@STORAGE_SECONDS.timed(op="load_knowledge_base")
 def load_knowledge_base():
     """Загружает базу знаний из JSON"""
     global KNOWLEDGE_BASE
@@ -70,9 +345,10 @@ def load_knowledge_base():
         try:
             with open(KNOWLEDGE_FILE, "r", encoding="utf-8") as f:
                 KNOWLEDGE_BASE = json.load(f)
-            print("✅ База знаний загружена")
+            invalidate_data_version("knowledge_base")
+            log.info("База знаний загружена")
         except Exception as e:
-            print(f"❌ Ошибка загрузки базы знаний: {e}")
+            log.error(f"Ошибка загрузки базы знаний: {e}")
     else:
         KNOWLEDGE_BASE = {
             "привет": "👋 Привет! Рад вас видеть в D-Space! 😊\nГотов помочь с выбором развлечений",
@@ -80,17 +356,42 @@ def load_knowledge_base():
             "спасибо": "Пожалуйста! Рад был помочь! 😊"
         }
         save_knowledge_base()
-        print("✅ Создана база знаний по умолчанию")
+        log.info("Создана база знаний по умолчанию")
 
+@STORAGE_SECONDS.timed(op="save_knowledge_base")
 def save_knowledge_base():
     """Сохраняет базу знаний в JSON"""
+    invalidate_data_version("knowledge_base")
+    try:
+        write_json(KNOWLEDGE_FILE, KNOWLEDGE_BASE)
+        record_write(KNOWLEDGE_FILE)
+        log.info("База знаний сохранены")
+    except Exception as e:
+        log.error(f"Ошибка сохранения базы знаний: {e}")
+
+@STORAGE_SECONDS.timed(op="load_answer_candidates")
+def load_answer_candidates():
+    """Загружает кандидатов в базу знаний из JSON"""
+    if not os.path.exists(CANDIDATES_FILE):
+        return []
     try:
-        with open(KNOWLEDGE_FILE, "w", encoding="utf-8") as f:
-            json.dump(KNOWLEDGE_BASE, f, ensure_ascii=False, indent=4)
-        print("✅ База знаний сохранены")
+        with open(CANDIDATES_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
     except Exception as e:
-        print(f"❌ Ошибка сохранения базы знаний: {e}")
+        log.error(f"Ошибка загрузки кандидатов: {e}")
+        return []
 
+@STORAGE_SECONDS.timed(op="save_answer_candidates")
+def save_answer_candidates(candidates):
+    """Сохраняет кандидатов в базу знаний в JSON"""
+    try:
+        write_json(CANDIDATES_FILE, candidates)
+        record_write(CANDIDATES_FILE)
+        log.info("Кандидаты в базу знаний сохранены")
+    except Exception as e:
+        log.error(f"Ошибка сохранения кандидатов: {e}")
+
+@STORAGE_SECONDS.timed(op="load_bookings")
 def load_bookings():
     """Загружает бронирования из JSON"""
     global BOOKINGS
@@ -98,22 +399,38 @@ def load_bookings():
         try:
             with open(BOOKINGS_FILE, "r", encoding="utf-8") as f:
                 BOOKINGS = json.load(f)
-            print("✅ Бронирования загружены")
+            log.info("Бронирования загружены")
         except Exception as e:
-            print(f"❌ Ошибка загрузки бронирований: {e}")
+            log.error(f"Ошибка загрузки бронирований: {e}")
     else:
         BOOKINGS = []
-        print("✅ Создан файл бронирований по умолчанию")
+        log.info("Создан файл бронирований по умолчанию")
 
+@STORAGE_SECONDS.timed(op="save_bookings")
 def save_bookings():
     """Сохраняет бронирования в JSON"""
     try:
-        with open(BOOKINGS_FILE, "w", encoding="utf-8") as f:
-            json.dump(BOOKINGS, f, ensure_ascii=False, indent=4)
-        print("✅ Бронирования сохранены")
+        write_json(BOOKINGS_FILE, BOOKINGS)
+        record_write(BOOKINGS_FILE)
+        log.info("Бронирования сохранены")
+    except Exception as e:
+        log.error(f"Ошибка сохранения бронирований: {e}")
+
+@STORAGE_SECONDS.timed(op="add_booking")
+def add_booking(new_booking):
+    """Дописывает бронь в JSON под файловой блокировкой (брони других воркеров не теряются)"""
+    global BOOKINGS
+    try:
+        with update_json(BOOKINGS_FILE) as bookings:
+            bookings.append(new_booking)
+        BOOKINGS = bookings
+        record_write(BOOKINGS_FILE)
+        log.info("Бронирования сохранены")
     except Exception as e:
-        print(f"❌ Ошибка сохранения бронирований: {e}")
+        BOOKINGS.append(new_booking)
+        log.error(f"Ошибка сохранения бронирований: {e}")
 
+@STORAGE_SECONDS.timed(op="load_suggestion_map")
 def load_suggestion_map():
     """Загружает контекстные подсказки из JSON"""
     global suggestionMap
@@ -123,10 +440,12 @@ def load_suggestion_map():
         try:
             with open(SUGGESTIONS_FILE, "r", encoding="utf-8") as f:
                 suggestionMap = json.load(f)
-            print("✅ Подсказки загружены из файла")
+            invalidate_data_version("suggestions")
+            rebuild_suggestion_index()
+            log.info("Подсказки загружены из файла")
             return  # Выходим после успешной загрузки
         except Exception as e:
-            print(f"❌ Ошибка загрузки подсказок: {e}")
+            log.error(f"Ошибка загрузки подсказок: {e}")
             suggestionMap = {}
     
     # Создаем дефолтные подсказки ТОЛЬКО если файла нет или ошибка загрузки
@@ -149,23 +468,30 @@ def load_suggestion_map():
         ]
     }
     
+    invalidate_data_version("suggestions")
+    rebuild_suggestion_index()
+
     # Сохраняем дефолтные подсказки только при первом создании
     try:
-        with open(SUGGESTIONS_FILE, "w", encoding="utf-8") as f:
-            json.dump(suggestionMap, f, ensure_ascii=False, indent=4)
-        print("✅ Создан файл suggestions.json по умолчанию")
+        write_json(SUGGESTIONS_FILE, suggestionMap)
+        record_write(SUGGESTIONS_FILE)
+        log.info("Создан файл suggestions.json по умолчанию")
     except Exception as e:
-        print(f"❌ Ошибка сохранения подсказок: {e}")
+        log.error(f"Ошибка сохранения подсказок: {e}")
 
+@STORAGE_SECONDS.timed(op="save_suggestion_map")
 def save_suggestion_map():
     """Сохраняет контекстные подсказки в JSON"""
+    invalidate_data_version("suggestions")
+    rebuild_suggestion_index()
     try:
-        with open(SUGGESTIONS_FILE, "w", encoding="utf-8") as f:
-            json.dump(suggestionMap, f, ensure_ascii=False, indent=4)
-        print("✅ Подсказки сохранены")
+        write_json(SUGGESTIONS_FILE, suggestionMap)
+        record_write(SUGGESTIONS_FILE)
+        log.info("Подсказки сохранены")
     except Exception as e:
-        print(f"❌ Ошибка сохранения подсказок: {e}")
+        log.error(f"Ошибка сохранения подсказок: {e}")
 
+@STORAGE_SECONDS.timed(op="load_menu_categories")
 def load_menu_categories():
     """Загружает категории меню из JSON файла."""
     if os.path.exists(MENU_CATEGORIES_FILE):
@@ -184,7 +510,7 @@ def load_menu_categories():
                                     if k not in ['attractions', 'events', 'services', 'info']}
             }
         except Exception as e:
-            print(f"❌ Ошибка загрузки категорий меню: {e}")
+            log.error(f"Ошибка загрузки категорий меню: {e}")
             return {
                 "system_categories": {
                     "attractions": "🎪 Аттракционы",
@@ -207,6 +533,7 @@ def load_menu_categories():
             "custom_categories": {}
         }
 
+@STORAGE_SECONDS.timed(op="save_menu_categories")
 def save_menu_categories(categories_dict):
     """Сохраняет категории меню в JSON файл."""
     try:
@@ -217,29 +544,34 @@ def save_menu_categories(categories_dict):
         if "custom_categories" in categories_dict:
             flat_categories.update(categories_dict["custom_categories"])
         
-        with open(MENU_CATEGORIES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(flat_categories, f, ensure_ascii=False, indent=2)
-        print("✅ Категории меню сохранены")
+        write_json(MENU_CATEGORIES_FILE, flat_categories, indent=2)
+        invalidate_data_version("categories")
+        record_write(MENU_CATEGORIES_FILE)
+        log.info("Категории меню сохранены")
     except Exception as e:
-        print(f"❌ Ошибка сохранения категорий меню: {e}")
+        log.error(f"Ошибка сохранения категорий меню: {e}")
 
+@STORAGE_SECONDS.timed(op="load_menu")
 def load_menu():
     """Загружает меню из JSON"""
     global MENU_CACHE
     
     # Используем кэш если есть
     if MENU_CACHE is not None:
+        CACHE_LOOKUPS.inc(cache="menu", result="hit")
         return MENU_CACHE
+    CACHE_LOOKUPS.inc(cache="menu", result="miss")
         
     menu_items = []
     if os.path.exists(MENU_FILE):
         try:
             with open(MENU_FILE, "r", encoding="utf-8") as f:
                 menu_items = json.load(f)
-            print("✅ Меню загружено")
+            log.info("Меню загружено")
             MENU_CACHE = menu_items
+            rebuild_menu_index(menu_items)
         except Exception as e:
-            print(f"❌ Ошибка загрузки меню: {e}")
+            log.error(f"Ошибка загрузки меню: {e}")
     else:
         menu_items = [
             {"admin_text": "VR-зоны", "display_text": "🎮 VR-зоны — от 300 ₽", "question": "vr", "category": "attractions", "price_info": "от 300 ₽", "suggestion_topic": "vr"},
@@ -249,31 +581,260 @@ def load_menu():
             {"admin_text": "Выпускные", "display_text": "🎓 Выпускные", "question": "выпускные", "category": "events", "price_info": "", "suggestion_topic": "default"},
             {"admin_text": "Мероприятия", "display_text": "🎪 Мероприятия", "question": "мероприятия", "category": "events", "price_info": "", "suggestion_topic": "default"}
         ]
-        with open(MENU_FILE, "w", encoding="utf-8") as f:
-            json.dump(menu_items, f, ensure_ascii=False, indent=4)
-        print("✅ Создан файл menu.json по умолчанию")
+        write_json(MENU_FILE, menu_items)
+        record_write(MENU_FILE)
+        log.info("Создан файл menu.json по умолчанию")
         MENU_CACHE = menu_items
+        rebuild_menu_index(menu_items)
     return menu_items
 
+@STORAGE_SECONDS.timed(op="save_menu")
 def save_menu(menu_items):
     """Сохраняет меню в JSON"""
     try:
-        with open(MENU_FILE, "w", encoding="utf-8") as f:
-            json.dump(menu_items, f, ensure_ascii=False, indent=4)
-        print("✅ Меню сохранено")
+        write_json(MENU_FILE, menu_items)
+        record_write(MENU_FILE)
+        log.info("Меню сохранено")
         
         # 🔥 Принудительно обновляем глобальную переменную
         global MENU_CACHE
         MENU_CACHE = menu_items
+        rebuild_menu_index(menu_items)
         
     except Exception as e:
-        print(f"❌ Ошибка сохранения меню: {e}")
+        log.error(f"Ошибка сохранения меню: {e}")
+
+def rebuild_menu_index(menu_items):
+    """Индекс вопрос кнопки → тема подсказок (вместо перебора меню в chat)"""
+    global MENU_TOPIC_INDEX
+    index = {}
+    for item in menu_items:
+        question = item.get("question")
+        if question and question not in index:
+            index[question] = item.get("suggestion_topic")
+    MENU_TOPIC_INDEX = index
+    invalidate_data_version("menu")
+
+def rebuild_suggestion_index():
+    """Индекс вопрос подсказки → (тема, подсказка) вместо перебора всех тем"""
+    global SUGGESTION_INDEX
+    index = {}
+    for topic, items in suggestionMap.items():
+        for item in items:
+            key = normalize_question(item.get("question", ""))
+            if key and key not in index:
+                index[key] = (topic, item)
+    SUGGESTION_INDEX = index
+
+def correct_question(question):
+    """Нормализованный вопрос с исправленной раскладкой, транслитом и опечатками"""
+    global QUERY_CORRECTOR
+    corrector = QUERY_CORRECTOR
+    if corrector is None:
+        phrases = list(KNOWLEDGE_BASE)
+        for items in suggestionMap.values():
+            phrases.extend(item.get("question") or item.get("text", "") for item in items)
+        corrector = QUERY_CORRECTOR = QueryCorrector(phrases)
+    return corrector.correct(question)
+
+def knowledge_lookup(question):
+    """Ответ из базы знаний: точное совпадение, затем нормализованное, затем исправленное"""
+    global KNOWLEDGE_NORMALIZED_INDEX
+    answer = KNOWLEDGE_BASE.get(question)
+    if answer:
+        return answer
+    index = KNOWLEDGE_NORMALIZED_INDEX
+    if index is None:
+        index = {}
+        for key in KNOWLEDGE_BASE:
+            index.setdefault(normalize_question(key), key)
+        KNOWLEDGE_NORMALIZED_INDEX = index
+    key = index.get(normalize_question(question))
+    if key is None:
+        key = index.get(correct_question(question))
+    return KNOWLEDGE_BASE.get(key) if key is not None else None
+
+def suggestion_chips(topic, inline_answers=False):
+    """Подсказки темы для ответа чата; inline_answers — вместе с готовыми ответами"""
+    fields = ("text", "question", "answer") if inline_answers else ("text", "question")
+    return [{field: item.get(field) for field in fields} for item in suggestionMap.get(topic, [])]
+
+def retrieval_index():
+    """BM25-индекс записей с ответами; строится при первом вызове GPT после изменения данных"""
+    global RETRIEVAL_INDEX
+    index = RETRIEVAL_INDEX
+    if index is None:
+        entries = {}
+        # Как в chat(): ответ подсказки важнее ответа базы знаний на тот же вопрос
+        for question, answer in KNOWLEDGE_BASE.items():
+            if isinstance(answer, str) and answer.strip():
+                entries[normalize_question(question)] = (question, answer)
+        for items in suggestionMap.values():
+            for item in items:
+                if item.get("answer"):
+                    question = item.get("question") or item.get("text", "")
+                    entries[normalize_question(question)] = (question, item["answer"])
+        index = RETRIEVAL_INDEX = BM25Index.build(list(entries.values()))
+    return index
+
+def similar_questions():
+    """Матрица похожих вопросов; строится при загрузке данных и после их изменения"""
+    global SIMILAR_QUESTIONS
+    similar = SIMILAR_QUESTIONS
+    if similar is None:
+        entries = []
+        # Подсказки первыми: при совпадении вопроса нужен их короткий текст кнопки
+        for items in suggestionMap.values():
+            for item in items:
+                if item.get("answer"):
+                    question = item.get("question") or item.get("text", "")
+                    entries.append((item.get("text") or question, question, item["answer"]))
+        for question, answer in KNOWLEDGE_BASE.items():
+            if isinstance(answer, str) and answer.strip():
+                entries.append((question[:1].upper() + question[1:], question, answer))
+        similar = SIMILAR_QUESTIONS = SimilarQuestions(entries, min_score=SIMILAR_MIN_SCORE)
+        if not similar.available:
+            log.info("NumPy не установлен — похожие вопросы не предлагаются")
+    return similar
+
+def similar_chips(question, inline_answers=False):
+    """Подсказки «Возможно, вы имели в виду» — известные вопросы, похожие на заданный"""
+    with CHAT_STAGE_SECONDS.time(stage="similar_questions"):
+        found = similar_questions().closest(question, SIMILAR_TOP_K)
+    chips = []
+    for _score, text, known_question, answer in found:
+        chip = {"text": text, "question": known_question}
+        if inline_answers:
+            chip["answer"] = answer
+        chips.append(chip)
+    return chips
+
+def prompt_context(question, history=None):
+    """Справка D-Space для системного промпта по вопросу и предыдущему вопросу диалога"""
+    query = correct_question(question)
+    if history:
+        # Уточнение вроде "а для 10 человек?" ищем вместе с предыдущим вопросом
+        previous = [m["text"] for m in history if m["role"] == "user"]
+        if previous:
+            query = f"{previous[-1]} {question}"
+    return build_context(retrieval_index(), query, RAG_TOP_K, RAG_MAX_CHARS)
+
+def build_snapshot_payload():
+    """Нормализованные структуры и индексы для бинарного снимка"""
+    return {
+        "knowledge_base": KNOWLEDGE_BASE,
+        "suggestions": suggestionMap,
+        "menu": MENU_CACHE if MENU_CACHE is not None else [],
+        "menu_topic_index": MENU_TOPIC_INDEX,
+        "retrieval_index": retrieval_index().to_payload()
+    }
+
+def snapshot_writable():
+    """Можно ли записать снимок рядом с SNAPSHOT_FILE"""
+    return os.access(os.path.dirname(os.path.abspath(SNAPSHOT_FILE)), os.W_OK)
+
+@STORAGE_SECONDS.timed(op="save_snapshot")
+def save_snapshot():
+    """Пересобирает бинарный снимок из текущих данных"""
+    try:
+        write_snapshot(SNAPSHOT_FILE, build_snapshot_payload(), SNAPSHOT_SOURCES)
+        record_write(SNAPSHOT_FILE)
+        log.info(f"Снимок данных сохранён: {SNAPSHOT_FILE}")
+        return True
+    except Exception as e:
+        log.warning(f"Не удалось сохранить снимок данных: {e}")
+        return False
+
+@STORAGE_SECONDS.timed(op="load_snapshot")
+def load_snapshot():
+    """Загружает данные из бинарного снимка; False — снимок отсутствует или устарел"""
+    global KNOWLEDGE_BASE, suggestionMap, MENU_CACHE, MENU_TOPIC_INDEX, RETRIEVAL_INDEX
+    payload, reason = read_snapshot(SNAPSHOT_FILE, SNAPSHOT_SOURCES)
+    if payload is None:
+        log.info(f"Снимок данных не используется ({reason}), читаем JSON")
+        return False
+
+    KNOWLEDGE_BASE = payload["knowledge_base"]
+    suggestionMap = payload["suggestions"]
+    MENU_CACHE = payload["menu"]
+    MENU_TOPIC_INDEX = payload["menu_topic_index"]
+    rebuild_suggestion_index()
+    invalidate_data_version("knowledge_base", "suggestions", "menu")
+    RETRIEVAL_INDEX = BM25Index.from_payload(payload["retrieval_index"])
+    log.info("Данные загружены из снимка")
+    return True
+
+def menu_categories_flat():
+    """Категории меню одним словарём: ключ → название"""
+    categories = load_menu_categories()
+    merged = {**categories["system_categories"], **categories["custom_categories"]}
+    # В файле встречаются служебные вложенные словари — оставляем только названия
+    return {key: name for key, name in merged.items() if isinstance(name, str)}
+
+def build_bootstrap_payload():
+    """Всё для старта чата: меню с готовыми ответами, категории и подсказки с ответами"""
+    global BOOTSTRAP_CACHE
+    if BOOTSTRAP_CACHE is not None:
+        return BOOTSTRAP_CACHE
+
+    menu = []
+    for item in load_menu():
+        question = item.get("question", "")
+        # Тот же порядок, что в chat(): сначала подсказки, затем база знаний;
+        # без готового ответа клиент спросит сервер
+        entry = SUGGESTION_INDEX.get(normalize_question(question))
+        if entry and entry[1].get("answer"):
+            answer, source = entry[1]["answer"], "suggestion_map"
+        else:
+            answer = knowledge_lookup(question.strip().lower())
+            source = "knowledge_base" if answer else None
+        menu.append({
+            "text": item.get("display_text", item.get("admin_text", "")),
+            "question": question,
+            "category": item.get("category", ""),
+            "suggestion_topic": item.get("suggestion_topic", "default"),
+            "answer": answer,
+            "source": source
+        })
+
+    BOOTSTRAP_CACHE = {
+        "version": data_version("bootstrap"),
+        "menu": menu,
+        "categories": menu_categories_flat(),
+        "suggestions": suggestionMap
+    }
+    return BOOTSTRAP_CACHE
 
-# - Загрузка данных при старте -
-load_knowledge_base()
-load_bookings()
-load_suggestion_map()
-load_menu()
+def build_knowledge_export():
+    """(версия, JSON) выгрузки базы знаний и подсказок для ответов в браузере"""
+    global KNOWLEDGE_EXPORT_CACHE
+    cached = KNOWLEDGE_EXPORT_CACHE
+    if cached is not None:
+        return cached
+
+    version = data_version("knowledge_export")
+    payload = {
+        "version": version,
+        "knowledge_base": KNOWLEDGE_BASE,
+        "suggestions": [
+            {"question": item["question"], "answer": item["answer"], "topic": topic}
+            for topic, items in suggestionMap.items() for item in items if item.get("answer")
+        ]
+    }
+    # Сериализуем один раз на версию: выгрузка большая, а меняется редко
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    KNOWLEDGE_EXPORT_CACHE = (version, body)
+    return KNOWLEDGE_EXPORT_CACHE
+
+# Откуда берутся данные для data_version
+DATA_SOURCES = {
+    "menu": load_menu,
+    "suggestions": lambda: suggestionMap,
+    "knowledge_base": lambda: KNOWLEDGE_BASE,
+    "categories": menu_categories_flat,
+    "bootstrap": lambda: [data_version(name) for name in ("menu", "suggestions", "knowledge_base", "categories")],
+    "knowledge_export": lambda: [data_version(name) for name in ("suggestions", "knowledge_base")]
+}
 
 # - Маршруты -
 @app.route("/")
@@ -281,18 +842,72 @@ def index():
     """Главная страница"""
     return render_template("index.html")
 
+def conversation_id():
+    """Идентификатор диалога посетителя (хранится в подписанной cookie сессии)"""
+    chat_id = session.get("chat_id")
+    if not chat_id:
+        chat_id = session["chat_id"] = uuid.uuid4().hex
+    return chat_id
+
+def answer_with_gpt(question, chat_id):
+    """Ответ для вопроса без готового ответа: (текст, источник)"""
+    response = None
+    try:
+        with CHAT_STAGE_SECONDS.time(stage="learned_lookup"):
+            response = LEARNED.lookup(question)
+    except Exception as e:
+        log.error(f"Ошибка слоя оценённых ответов: {e}")
+    if response:
+        return response, "learned"
+
+    # Сколько диалога попадёт в промпт, решает профиль класса вопроса (приветствию — нисколько)
+    history = gpt_history(question, CONVERSATIONS.history(chat_id))
+    try:
+        with CHAT_STAGE_SECONDS.time(stage="gpt"):
+            response = ask_gpt(question, history=history)
+    except GPTUnavailableError as e:
+        return e.answer, "fallback"
+    except Exception as e:
+        return f"❌ Ошибка: {str(e)}", "error"
+    # Ответ, построенный с учётом диалога, как самостоятельный не запоминаем
+    if not history and not response.startswith("❌"):
+        after_response(remember_gpt_answer, question, response)
+    return response, "yandex_gpt"
+
+def remember_gpt_answer(question, response):
+    """Запоминает ответ GPT кандидатом в слой оценённых ответов"""
+    try:
+        LEARNED.record(question, response)
+    except Exception as e:
+        log.error(f"Ошибка слоя оценённых ответов: {e}")
+
+def after_response(fn, *args):
+    """Вызывает fn(*args) после отправки ответа, чтобы запись файла не задерживала посетителя"""
+    if not has_request_context():
+        fn(*args)
+        return
+
+    @after_this_request
+    def schedule(response):
+        response.call_on_close(lambda: fn(*args))
+        return response
+
 @app.route("/chat", methods=["POST"])
 def chat():
     """Обработка чат-сообщений с возвратом подсказок"""
     try:
         data = request.json
         question = data.get("message", "").strip().lower()
+        # Клиент может попросить ответы подсказок сразу, чтобы не ходить за ними отдельно
+        inline_answers = bool(data.get("inline_answers"))
         
-        print(f"🔍 Вопрос: {question}")
-        print(f"📋 Доступные темы подсказок: {list(suggestionMap.keys())}")
+        debug = log.isEnabledFor(logging.DEBUG)
+        if debug:
+            log.debug("Вопрос в чат", extra={"question": question, "topics": list(suggestionMap.keys())})
 
         if not question:
             return jsonify({"response": "Пожалуйста, задайте вопрос.", "source": "error", "suggestions": []})
+        chat_id = conversation_id()
         
         # Сначала проверяем suggestionMap (подсказки с ответами)
         response = None
@@ -300,64 +915,66 @@ def chat():
         suggestions = []
         found_topic = None
         
-        # Ищем ответ в suggestionMap по точному совпадению вопроса
-        for topic, items in suggestionMap.items():
-            for item in items:
-                if item["question"] == question:
-                    response = item.get("answer")
-                    found_topic = topic
-                    print(f"✅ Найден ответ в теме: {topic}")
-                    break
-            if response:
-                break
+        # Ищем ответ в suggestionMap по точному совпадению вопроса (через индекс)
+        with CHAT_STAGE_SECONDS.time(stage="suggestion_lookup"):
+            entry = (SUGGESTION_INDEX.get(normalize_question(question))
+                     or SUGGESTION_INDEX.get(correct_question(question)))
+            if entry and entry[1].get("answer"):
+                found_topic, item = entry
+                response = item["answer"]
+                if debug:
+                    log.debug("Найден ответ в теме подсказок", extra={"topic": found_topic})
         
         # Если не нашли в suggestionMap, проверяем базу знаний
         if not response:
-            response = KNOWLEDGE_BASE.get(question)
+            with CHAT_STAGE_SECONDS.time(stage="knowledge_base_lookup"):
+                response = knowledge_lookup(question)
             source = "knowledge_base"
-            if response:
-                print(f"✅ Найден ответ в базе знаний")
+            if response and debug:
+                log.debug("Найден ответ в базе знаний")
         
-        # Если все еще нет ответа, используем Yandex GPT
+        # Если все еще нет ответа — хорошо оценённые ответы GPT, затем сам Yandex GPT.
+        # Похожие вопросы с готовыми ответами подбираются заранее: это доли миллисекунды
+        similar = []
         if not response:
-            try:
-                response = call_yandex_gpt(question)
-                source = "yandex_gpt"
-                print(f"✅ Ответ от Yandex GPT")
-            except Exception as e:
-                response = f"❌ Ошибка: {str(e)}"
-                source = "error"
+            similar = similar_chips(question, inline_answers)
+            response, source = answer_with_gpt(question, chat_id)
+        if source not in ("error", "fallback"):
+            CONVERSATIONS.append(chat_id, question, response)
         
         # Получаем подсказки для текущей темы
+        suggestions_started = time.perf_counter()
+        menu_topic = None
         if found_topic:
             # Если нашли тему в suggestionMap, берем все подсказки из этой темы
-            suggestions = [{"text": s["text"], "question": s["question"]} for s in suggestionMap.get(found_topic, [])]
-            print(f"🎯 Подсказки из темы: {found_topic}")
+            suggestions = suggestion_chips(found_topic, inline_answers)
+        elif similar:
+            # Ответ от GPT (или его нет) — предлагаем похожие вопросы с мгновенным ответом
+            suggestions = similar
+        elif source == "fallback":
+            # GPT недоступен — предлагаем общие темы, на которые ответ есть без него
+            suggestions = suggestion_chips("default", inline_answers)
         else:
             # Если не нашли тему, ищем по меню - определяем тему по простому вопросу
-            menu_items = load_menu()
-            menu_topic = None
-            
-            # Ищем соответствующий пункт меню
-            for item in menu_items:
-                if item["question"] == question:
-                    menu_topic = item.get("suggestion_topic")
-                    print(f"📌 Найден пункт меню с темой: {menu_topic}")
-                    break
-            
+            load_menu()
+            menu_topic = MENU_TOPIC_INDEX.get(question)
             # Если нашли тему в меню, берем подсказки для этой темы
             if menu_topic and menu_topic in suggestionMap:
-                suggestions = [{"text": s["text"], "question": s["question"]} for s in suggestionMap.get(menu_topic, [])]
-                print(f"🎯 Подсказки из темы меню: {menu_topic}")
+                suggestions = suggestion_chips(menu_topic, inline_answers)
             else:
                 # Если тема не найдена, используем дефолтные подсказки
-                suggestions = [{"text": s["text"], "question": s["question"]} for s in suggestionMap.get("default", [])]
-                print(f"🎯 Использованы дефолтные подсказки")
+                suggestions = suggestion_chips("default", inline_answers)
         
-        print(f"🎯 Найдено подсказок: {len(suggestions)}")
-        print(f"🎯 Список подсказок: {[s['text'] for s in suggestions]}")
+        CHAT_STAGE_SECONDS.observe(time.perf_counter() - suggestions_started, stage="suggestions")
+        if debug:
+            log.debug("Подсказки подобраны", extra={
+                "topic": found_topic or menu_topic or "default",
+                "suggestions": [s["text"] for s in suggestions],
+            })
         
-        log_interaction(question, response, source)
+        with CHAT_STAGE_SECONDS.time(stage="log_interaction"):
+            log_interaction(question, response, source)
+        CHAT_RESPONSES.inc(endpoint="chat", source=source)
         return jsonify({
             "response": response,
             "source": source,
@@ -365,30 +982,44 @@ def chat():
         })
     
     except Exception as e:
-        print(f"❌ Ошибка в функции chat: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Ошибка в функции chat: %s", e)
         return jsonify({"response": "❌ Произошла ошибка при обработке запроса", "source": "error", "suggestions": []})
 
+@app.route("/chat/reset", methods=["POST"])
+def reset_chat():
+    """Забывает историю диалога посетителя (кнопка очистки чата)"""
+    chat_id = session.get("chat_id")
+    if chat_id:
+        CONVERSATIONS.forget(chat_id)
+    return jsonify({"status": "ok"})
+
 @app.route("/ask", methods=["POST"])
 def ask():
     """Обработка вопросов"""
     data = request.json
     question = data.get("question", "").strip().lower()
+    # Как в /chat: похожие вопросы приходят сразу с ответами, нажатие на них не требует запроса
+    inline_answers = bool(data.get("inline_answers"))
     if not question:
         return jsonify({"answer": "Пожалуйста, задайте вопрос."})
+    chat_id = conversation_id()
     
-    response = KNOWLEDGE_BASE.get(question)
+    with CHAT_STAGE_SECONDS.time(stage="knowledge_base_lookup"):
+        response = knowledge_lookup(question)
     source = "knowledge_base"
+    similar = []
     if not response:
-        try:
-            response = call_yandex_gpt(question)
-            source = "yandex_gpt"
-        except Exception as e:
-            response = f"❌ Ошибка: {str(e)}"
-            source = "error"
+        if inline_answers:
+            similar = similar_chips(question, inline_answers)
+        response, source = answer_with_gpt(question, chat_id)
+    if source not in ("error", "fallback"):
+        CONVERSATIONS.append(chat_id, question, response)
     
-    log_interaction(question, response, source)
+    with CHAT_STAGE_SECONDS.time(stage="log_interaction"):
+        log_interaction(question, response, source)
+    CHAT_RESPONSES.inc(endpoint="ask", source=source)
+    if inline_answers:
+        return jsonify({"answer": response, "suggestions": similar})
     return jsonify({"answer": response})
 
 @app.route("/feedback", methods=["POST"])
@@ -397,30 +1028,31 @@ def feedback():
     data = request.json
     question = data.get("question")
     feedback = data.get("feedback")
+    answer = data.get("answer")
     feedback_file = "feedback.json"
-    logs = []
-    if os.path.exists(feedback_file):
+    # Хорошие оценки переводят ответ GPT в слой готовых ответов, плохая — убирает из него
+    if question:
         try:
-            with open(feedback_file, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if content:
-                    logs = json.loads(content)
-        except:
-            pass
-    logs.append({
-        "timestamp": datetime.now().isoformat(),
-        "question": question,
-        "feedback": feedback
-    })
+            # Один голос на диалог: повторные оценки из той же сессии не копятся
+            LEARNED.rate(question, feedback, answer, voter=session.get("chat_id"))
+        except Exception as e:
+            log.error(f"Ошибка слоя оценённых ответов: {e}")
     try:
-        with open(feedback_file, "w", encoding="utf-8") as f:
-            json.dump(logs, f, ensure_ascii=False, indent=4)
+        # Чтение и запись под одной блокировкой: одновременные оценки не затирают друг друга
+        with update_json(feedback_file) as logs:
+            logs.append({
+                "timestamp": datetime.now().isoformat(),
+                "question": question,
+                "feedback": feedback
+            })
+        record_write(feedback_file)
         return jsonify({"status": "ok"})
     except Exception as e:
-        print(f"❌ Ошибка сохранения оценки: {e}")
+        log.error(f"Ошибка сохранения оценки: {e}")
         return jsonify({"status": "error", "message": str(e)})
 
 @app.route("/suggestions/<topic>")
+@cache_by_version("suggestions")
 def get_suggestions_by_topic(topic):
     """Возвращает подсказки для указанной темы"""
     try:
@@ -433,10 +1065,24 @@ def get_suggestions_by_topic(topic):
             
         return jsonify({"suggestions": suggestions})
     except Exception as e:
-        print(f"❌ Ошибка получения подсказок для темы {topic}: {e}")
+        log.error(f"Ошибка получения подсказок для темы {topic}: {e}")
         return jsonify({"suggestions": []})
 
+@app.route("/api/bootstrap")
+@cache_by_version("bootstrap")
+def get_bootstrap():
+    """Версионированные данные для старта чата; клиент хранит их по version"""
+    return jsonify(build_bootstrap_payload())
+
+@app.route("/api/knowledge-export")
+@cache_by_version("knowledge_export")
+def get_knowledge_export():
+    """База знаний и подсказки для ответов прямо в браузере (сжимается при отдаче)"""
+    _version, body = build_knowledge_export()
+    return Response(body, mimetype="application/json")
+
 @app.route("/api/menu-display")
+@cache_by_version("menu")
 def get_menu_display():
     """API для получения меню с отображаемым текстом"""
     menu_items = load_menu()
@@ -500,11 +1146,11 @@ def get_suggestion_answer():
     if not question:
         return jsonify({"answer": "❌ Вопрос не указан"}), 400
 
-    # Ищем ответ в suggestionMap
-    for topic, suggestions in suggestionMap.items():
-        for suggestion in suggestions:
-            if suggestion.get("question", "").strip().lower() == question:
-                return jsonify({"answer": suggestion.get("answer", "❌ Ответ не найден")})
+    # Ищем ответ в suggestionMap через индекс
+    entry = (SUGGESTION_INDEX.get(normalize_question(question))
+             or SUGGESTION_INDEX.get(correct_question(question)))
+    if entry:
+        return jsonify({"answer": entry[1].get("answer", "❌ Ответ не найден")})
 
     return jsonify({"answer": "❌ Ответ не найден"}), 404
 
@@ -576,7 +1222,7 @@ def add_menu_item():
         menu_items.append(new_item)
         save_menu(menu_items)
         
-        logging.info(f"Администратор добавил кнопку в меню: {admin_text} -> {question} (категория: {category})")
+        log.info(f"Администратор добавил кнопку в меню: {admin_text} -> {question} (категория: {category})")
         return jsonify({"success": True})
         
     except Exception as e:
@@ -643,7 +1289,7 @@ def edit_menu_item(index):
         }
         
         save_menu(menu_items)
-        logging.info(f"Администратор обновил кнопку в меню: {admin_text} -> {question} (категория: {category})")
+        log.info(f"Администратор обновил кнопку в меню: {admin_text} -> {question} (категория: {category})")
         return jsonify({"success": True})
         
     except Exception as e:
@@ -662,7 +1308,7 @@ def delete_menu_item(index):
             removed = menu_items.pop(index)
             save_menu(menu_items)
             flash(f"✅ Кнопка '{removed['admin_text']}' удалена", "success")
-            logging.info(f"Администратор удалил кнопку из меню: {removed['admin_text']}")
+            log.info(f"Администратор удалил кнопку из меню: {removed['admin_text']}")
         else:
             flash("❌ Неверный индекс кнопки", "error")
     except Exception as e:
@@ -671,14 +1317,14 @@ def delete_menu_item(index):
     return redirect(url_for("admin_menu"))
 
 @app.route('/menu-items')
-@no_cache
+@cache_by_version("menu")
 def get_menu_items():
     """Возвращает меню для фронтенда"""
     menu_items = load_menu()
     return jsonify({"items": menu_items})
 
 @app.route('/menu-items/<category>')
-@no_cache
+@cache_by_version("menu")
 def get_menu_items_by_category(category):
     """Возвращает меню отфильтрованное по категории"""
     menu_items = load_menu()
@@ -738,7 +1384,7 @@ def add_menu_category():
     save_menu_categories(categories)
     
     flash(f"✅ Категория '{name}' успешно добавлена", "success")
-    logging.info(f"Администратор добавил категорию меню: {key} -> {name}")
+    log.info(f"Администратор добавил категорию меню: {key} -> {name}")
     return redirect(url_for("admin_menu_categories"))
 
 @app.route("/admin/menu/categories/delete/<string:key>")
@@ -764,7 +1410,7 @@ def delete_menu_category(key):
         del categories["custom_categories"][key]
         save_menu_categories(categories)
         flash(f"✅ Категория '{key}' успешно удалена", "success")
-        logging.info(f"Администратор удалил категорию меню: {key}")
+        log.info(f"Администратор удалил категорию меню: {key}")
     else:
         flash("❌ Категория не найдена", "error")
         
@@ -778,10 +1424,10 @@ def admin_login():
         password = request.form.get("password")
         if username == os.getenv("ADMIN_USER", "admin") and password == os.getenv("ADMIN_PASS", "1"):
             session["admin_logged_in"] = True
-            logging.info("Администратор вошёл в систему")
+            log.info("Администратор вошёл в систему")
             return redirect(url_for("admin_dashboard"))
         flash("❌ Неверный логин или пароль", "error")
-        logging.warning("Неудачная попытка входа в админку")
+        log.warning("Неудачная попытка входа в админку")
     return render_template("admin/login.html")
 
 @app.route("/admin")
@@ -807,7 +1453,7 @@ def knowledge_edit():
             if question and answer:
                 KNOWLEDGE_BASE[question] = answer
                 save_knowledge_base()
-                logging.info(f"Добавлен вопрос: '{question}'")
+                log.info(f"Добавлен вопрос: '{question}'")
                 flash("✅ Вопрос добавлен", "success")
             else:
                 flash("❌ Все поля обязательны", "error")
@@ -815,7 +1461,7 @@ def knowledge_edit():
             if question and answer and question in KNOWLEDGE_BASE:
                 KNOWLEDGE_BASE[question] = answer
                 save_knowledge_base()
-                logging.info(f"Изменён вопрос: '{question}'")
+                log.info(f"Изменён вопрос: '{question}'")
                 flash("✅ Ответ обновлён", "success")
             else:
                 flash("❌ Неверные данные", "error")
@@ -823,7 +1469,7 @@ def knowledge_edit():
             if question in KNOWLEDGE_BASE:
                 del KNOWLEDGE_BASE[question]
                 save_knowledge_base()
-                logging.info(f"Удалён вопрос: '{question}'")
+                log.info(f"Удалён вопрос: '{question}'")
                 flash("✅ Вопрос удалён", "success")
             else:
                 flash("❌ Вопрос не найден", "error")
@@ -831,6 +1477,73 @@ def knowledge_edit():
     load_knowledge_base()
     return render_template("admin/knowledge_edit.html", knowledge=KNOWLEDGE_BASE)
 
+@app.route("/admin/candidates", methods=["GET", "POST"])
+def admin_candidates():
+    """Проверка заранее сгенерированных ответов и перенос в базу знаний пачкой"""
+    if not session.get("admin_logged_in"):
+        return redirect(url_for("admin_login"))
+
+    candidates = load_answer_candidates()
+    if request.method == "POST":
+        action = request.form.get("action")
+        selected = []
+        for value in request.form.getlist("selected"):
+            # Индекс сверяем с вопросом: файл мог обновиться, пока страница была открыта
+            index = int(value) if value.isdigit() else -1
+            if 0 <= index < len(candidates) and candidates[index]["question"] == request.form.get(f"question-{index}"):
+                selected.append(index)
+
+        if not selected or action not in ("promote", "reject"):
+            flash("❌ Не выбрано ни одного ответа", "error")
+            return redirect(url_for("admin_candidates"))
+
+        for index in selected:
+            candidate = candidates[index]
+            if action == "promote":
+                answer = request.form.get(f"answer-{index}", "").strip() or candidate["answer"]
+                KNOWLEDGE_BASE[candidate["question"]] = answer
+                candidate["answer"] = answer
+                candidate["status"] = "promoted"
+            else:
+                candidate["status"] = "rejected"
+        if action == "promote":
+            save_knowledge_base()
+        save_answer_candidates(candidates)
+        log.info("Администратор обработал кандидатов", extra={"action": action, "count": len(selected)})
+        flash(f"✅ {'Перенесено в базу знаний' if action == 'promote' else 'Отклонено'}: {len(selected)}", "success")
+        return redirect(url_for("admin_candidates"))
+
+    pending = [(index, c) for index, c in enumerate(candidates) if c.get("status") == "pending"]
+    pending.sort(key=lambda item: item[1].get("count", 0), reverse=True)
+    return render_template("admin/candidates.html", pending=pending,
+                           promoted=sum(1 for c in candidates if c.get("status") == "promoted"),
+                           rejected=sum(1 for c in candidates if c.get("status") == "rejected"))
+
+@app.route("/admin/learned", methods=["GET", "POST"])
+def admin_learned():
+    """Ответы GPT, выдаваемые по оценкам посетителей, и список вето"""
+    if not session.get("admin_logged_in"):
+        return redirect(url_for("admin_login"))
+
+    if request.method == "POST":
+        action = request.form.get("action")
+        question = request.form.get("question", "").strip().lower()
+        if not question or action not in ("veto", "unveto"):
+            flash("❌ Неверные данные", "error")
+        else:
+            LEARNED.set_veto(question, vetoed=action == "veto")
+            log.info("Администратор изменил список вето", extra={"action": action, "question": question})
+            flash("✅ Вопрос больше не будет отвечаться по оценкам" if action == "veto" else "✅ Вето снято", "success")
+        return redirect(url_for("admin_learned"))
+
+    entries, veto = LEARNED.snapshot()
+    promoted = sorted((e for e in entries if e.get("promoted_at")), key=lambda e: e["good"], reverse=True)
+    rated = sorted((e for e in entries if not e.get("promoted_at") and (e["good"] or e["bad"])),
+                   key=lambda e: (e["bad"] == 0, e["good"]), reverse=True)
+    return render_template("admin/learned.html", promoted=promoted, rated=rated, veto=veto,
+                           pending=len(entries) - len(promoted) - len(rated),
+                           min_good=LEARNED.min_good, ttl_days=round(LEARNED.ttl / 86400))
+
 @app.route("/admin/logs")
 def view_logs():
     """Просмотр истории диалогов"""
@@ -846,7 +1559,7 @@ def view_logs():
                     logs = json.loads(content)
             logs = sorted(logs, key=lambda x: x["timestamp"], reverse=True)
         except Exception as e:
-            logging.error(f"Ошибка чтения логов: {e}")
+            log.error(f"Ошибка чтения логов: {e}")
             flash("❌ Ошибка загрузки логов", "error")
     
     return render_template("admin/logs.html", logs=logs)
@@ -863,7 +1576,7 @@ def edit_response():
     if question and new_answer:
         KNOWLEDGE_BASE[question] = new_answer
         save_knowledge_base()
-        logging.info(f"Изменён ответ через админку: '{question}'")
+        log.info(f"Изменён ответ через админку: '{question}'")
         return jsonify({"status": "ok"})
     
     return jsonify({"status": "error", "message": "Некорректные данные"}), 400
@@ -885,13 +1598,13 @@ def admin_logout():
     """Выход из админки"""
     session.pop("admin_logged_in", None)
     flash("Вы вышли из админки", "info")
-    logging.info("Администратор вышел из системы")
+    log.info("Администратор вышел из системы")
     return redirect(url_for("index"))
 
 @app.route("/static/<path:path>")
 def send_static(path):
-    """Раздача статики"""
-    return send_from_directory("static", path)
+    """Раздача статики (dist/ — сжатые варианты с вечным кэшированием)"""
+    return send_asset(path)
 
 @app.route("/booking", methods=["GET", "POST"])
 def booking():
@@ -912,9 +1625,8 @@ def booking():
                 "event_type": event_type,
                 "timestamp": datetime.now().isoformat()
             }
-            BOOKINGS.append(new_booking)
-            save_bookings()
-            logging.info(f"Новая бронь: {name}, {phone}")
+            add_booking(new_booking)
+            log.info(f"Новая бронь: {name}, {phone}")
             return render_template("booking.html", success="Спасибо! Мы свяжемся с вами.")
     
     return render_template("booking.html")
@@ -932,6 +1644,38 @@ def clear_cache_now():
     load_menu()
     return "✅ Кэш меню очищен! Теперь обновите страницу чата."
 
+@app.route("/metrics")
+def metrics():
+    """Метрики в текстовом формате Prometheus (сумма по всем воркерам)"""
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        abort(403)
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+@app.route("/admin/profiler", methods=["GET", "POST"])
+def admin_profiler():
+    """Сэмплирующий профайлер этого процесса: статус, запуск на N секунд, остановка"""
+    if not session.get("admin_logged_in"):
+        return jsonify({"status": "error", "message": "Доступ запрещён"}), 403
+
+    profiler = app.extensions["profiler"]
+    if request.method == "GET":
+        return jsonify(profiler.status())
+
+    data = request.get_json(silent=True) or request.form
+    if data.get("action") == "stop":
+        log.info("Администратор остановил профилирование")
+        return jsonify(profiler.stop())
+    try:
+        seconds = float(data.get("seconds", 30))
+        fraction = float(data.get("fraction", 1.0))
+        interval = float(data["interval"]) if data.get("interval") else None
+    except ValueError:
+        return jsonify({"status": "error", "message": "Неверные параметры"}), 400
+    if not 0 < seconds <= 600:
+        return jsonify({"status": "error", "message": "seconds должно быть от 0 до 600"}), 400
+    log.info("Администратор включил профилирование", extra={"seconds": seconds, "fraction": fraction})
+    return jsonify(profiler.start(seconds, fraction, interval))
+
 def get_local_ip():
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -943,60 +1687,136 @@ def get_local_ip():
         print(f"❌ Ошибка определения IP: {e}")
         return "127.0.0.1"
 
+def question_classifier():
+    """Классификатор вопросов; строится по меню при первом вызове GPT"""
+    global QUESTION_CLASSIFIER
+    classifier = QUESTION_CLASSIFIER
+    if classifier is None:
+        classifier = QUESTION_CLASSIFIER = QuestionClassifier(load_menu())
+    return classifier
+
+def gpt_history(question, history, question_class=None):
+    """Последние сообщения диалога, которые пойдут в промпт по профилю класса вопроса"""
+    if question_class is None:
+        question_class = question_classifier().classify(question)
+    depth = GPT_PROFILES[question_class]["history"]
+    # Приветствию история не нужна, короткому вопросу — только последний обмен
+    return history[-depth:] if history and depth else []
+
 def call_yandex_gpt(prompt, history=None):
-    """Вызов Yandex GPT с повторными попытками"""
-    url = "https://llm.api.cloud.yandex.net/foundationModels/v1/completion"
+    """Вызов Yandex GPT с повторными попытками в пределах GPT_DEADLINE_SECONDS.
+
+    maxTokens, модель и число сообщений истории берутся из профиля класса
+    вопроса (GPT_PROFILES). Если ответа нет (автомат защиты открыт, время или попытки кончились),
+    выбрасывает GPTUnavailableError — вызывающий отвечает GPT_FALLBACK_ANSWER.
+    """
+    import requests  # ленивый импорт: не замедляет холодный старт
+
+    question_class = question_classifier().classify(prompt)
+    profile = GPT_PROFILES[question_class]
+    GPT_QUESTIONS.inc(question_class=question_class)
+    history = gpt_history(prompt, history, question_class)
+
+    url = f"{YANDEX_GPT_BASE_URL}/foundationModels/v1/completion"
     headers = {
         "Authorization": f"Api-Key {os.getenv('YANDEX_API_KEY')}",
         "x-folder-id": os.getenv("YANDEX_FOLDER_ID"),
         "Content-Type": "application/json"
     }
     
-    system_prompt = """
-    Ты - ассистент D-Space. Отвечай дружелюбно и информативно.
-    Используй эмодзи для улучшения восприятия.
-    Ты – дружелюбный консультант D-Space. Отвечай кратко, структурированно, с эмодзи.
-    Если пользователь хочет заказать день рождения:
-    Предложи пакеты: Стандарт (8000 ₽), Экстрим (12 000 ₽), VR-приключение (15 000 ₽).
-    Предложи акции: +10% скидка при бронировании до 10 сентября.
-    Уточни: количество гостей, тематику, место проведения.
-    В конце предложи забронировать время или связаться по телефону.
-    Не выдумывай цены – если не знаешь, скажи честно, но предложи помощь.
-    Всегда завершай свой ответ открытым вопросом, чтобы продолжить диалог.
-    """
+    # Только записи базы знаний, относящиеся к вопросу, в пределах RAG_MAX_CHARS
+    with CHAT_STAGE_SECONDS.time(stage="retrieval"):
+        context = prompt_context(prompt, history)
+    system_prompt = f"{GPT_SYSTEM_PROMPT}\n\nСправка D-Space:\n{context or 'нет подходящих сведений'}"
     
     messages = [{"role": "system", "text": system_prompt}]
-    if history:
-        messages.extend(history)
+    messages.extend(history)
     messages.append({"role": "user", "text": prompt})
     
     payload = {
-        "modelUri": f"gpt://{os.getenv('YANDEX_FOLDER_ID')}/yandexgpt-lite",
+        "modelUri": f"gpt://{os.getenv('YANDEX_FOLDER_ID')}/{profile['model']}",
         "completionOptions": {
             "stream": False,
-            "temperature": 0.3,
-            "maxTokens": 1000
+            "temperature": GPT_TEMPERATURE,
+            "maxTokens": profile["max_tokens"]
         },
         "messages": messages
     }
     
-    for attempt in range(3):
+    call_started = time.perf_counter()
+    deadline = time.monotonic() + GPT_DEADLINE_SECONDS
+    reason = "failed"
+    for attempt in range(GPT_MAX_ATTEMPTS):
+        remaining = deadline - time.monotonic()
+        if remaining < GPT_MIN_ATTEMPT_SECONDS:
+            reason = "deadline"
+            break
+        if not GPT_CIRCUIT.allow():
+            reason = "circuit_open"
+            break
+        if attempt:
+            GPT_RETRIES.inc()
+        started = time.perf_counter()
+        outcome = "ok"
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=10)
+            if GPT_HEDGE_ENABLED:
+                # Таймаут считается при запуске: дубль стартует позже и получает только остаток до дедлайна.
+                # Дубль выигрывает, только если ответил успешно: быстрая ошибка не перебивает медленный ответ
+                response = GPT_HEDGER.call(
+                    lambda: requests.post(url, headers=headers, json=payload,
+                                          timeout=min(GPT_ATTEMPT_TIMEOUT, deadline - time.monotonic())),
+                    accept=lambda r: r.status_code == 200,
+                    hedge_until=deadline - GPT_MIN_ATTEMPT_SECONDS)
+            else:
+                response = requests.post(url, headers=headers, json=payload, timeout=min(GPT_ATTEMPT_TIMEOUT, remaining))
             if response.status_code == 200:
-                return response.json()["result"]["alternatives"][0]["message"]["text"]
+                result = response.json()["result"]
+                text = result["alternatives"][0]["message"]["text"]
+                GPT_CIRCUIT.record_success()
+                GPT_ANSWER_SECONDS.observe(time.perf_counter() - call_started, question_class=question_class)
+                usage = result.get("usage") or {}
+                GPT_TOKENS.inc(int(usage.get("inputTextTokens", 0)), question_class=question_class, kind="input")
+                GPT_TOKENS.inc(int(usage.get("completionTokens", 0)), question_class=question_class, kind="completion")
+                return text
             elif response.status_code == 401:
+                # Сервис доступен, ошибка в настройках — автомат тут не поможет
+                outcome = "unauthorized"
+                GPT_CIRCUIT.record_success()
                 return "❌ Ошибка авторизации. Проверьте API-ключ."
             elif response.status_code == 400:
+                outcome = "bad_request"
+                GPT_CIRCUIT.record_success()
                 return "❌ Ошибка параметров. Проверьте folder_id."
             else:
-                print(f"⚠️ Ошибка GPT (попытка {attempt + 1}): {response.status_code}")
+                outcome = f"http_{response.status_code}"
+                GPT_CIRCUIT.record_failure()
+                log.warning("Ошибка GPT (попытка %d): %s", attempt + 1, response.status_code)
         except requests.exceptions.RequestException as e:
-            print(f"⚠️ Ошибка подключения (попытка {attempt + 1}): {str(e)}")
-        time.sleep(1)
-    
-    return "❌ Не удалось получить ответ. Попробуйте позже."
+            outcome = "network_error"
+            GPT_CIRCUIT.record_failure()
+            log.warning("Ошибка подключения к GPT (попытка %d): %s", attempt + 1, e)
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            outcome = "bad_response"
+            GPT_CIRCUIT.record_failure()
+            log.warning("Неожиданный ответ GPT (попытка %d): %s", attempt + 1, e)
+        finally:
+            GPT_ATTEMPT_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+        # Пауза перед повтором, только если после неё останется время на попытку
+        if attempt + 1 < GPT_MAX_ATTEMPTS and deadline - time.monotonic() > GPT_RETRY_DELAY + GPT_MIN_ATTEMPT_SECONDS:
+            time.sleep(GPT_RETRY_DELAY)
+
+    GPT_UNAVAILABLE.inc(reason=reason)
+    raise GPTUnavailableError(reason)
+
+def ask_gpt(question, history=None):
+    """call_yandex_gpt в пуле GPT_EXECUTOR; при перегрузке пула — GPTUnavailableError"""
+    try:
+        return GPT_EXECUTOR.run(call_yandex_gpt, question, history=history)
+    except ExecutorOverloaded as e:
+        GPT_UNAVAILABLE.inc(reason=e.reason)
+        raise GPTUnavailableError(e.reason) from None
 
+@STORAGE_SECONDS.timed(op="log_interaction")
 def log_interaction(question, answer, source):
     """Логирует диалог в bot_log.json"""
     log_entry = {
@@ -1007,29 +1827,20 @@ def log_interaction(question, answer, source):
     }
     
     try:
-        logs = []
-        if os.path.exists(LOG_FILE):
-            with open(LOG_FILE, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if content:
-                    logs = json.loads(content)
-        
-        logs.append(log_entry)
-        
-        if len(logs) % 100 == 0:
-            backup_path = os.path.join(BACKUPS_DIR, f"bot_log_{int(time.time())}.json")
-            shutil.copy2(LOG_FILE, backup_path)
-            print(f"🔄 Создана резервная копия: {backup_path}")
-        
-        with open(LOG_FILE, "w", encoding="utf-8") as f:
-            json.dump(logs, f, ensure_ascii=False, indent=4)
+        # Под gthread диалоги пишут несколько потоков и воркеров: чтение и запись под одной блокировкой
+        with update_json(LOG_FILE) as logs:
+            logs.append(log_entry)
+
+            if len(logs) % 100 == 0:
+                backup_path = os.path.join(BACKUPS_DIR, f"bot_log_{int(time.time())}.json")
+                shutil.copy2(LOG_FILE, backup_path)
+                log.info("Создана резервная копия: %s", backup_path)
+        record_write(LOG_FILE)
         
-        print("✅ Диалог сохранен в лог")
-        logging.info("Диалог сохранен в лог")
+        log.debug("Диалог сохранен в лог")
     
     except Exception as e:
-        print(f"❌ Ошибка сохранения лога: {e}")
-        logging.error(f"Ошибка сохранения лога: {e}")
+        log.error("Ошибка сохранения лога: %s", e)
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 5000))
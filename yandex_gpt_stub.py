@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# yandex_gpt_stub.py
+"""Локальная заглушка Yandex GPT (foundationModels/v1/completion) для нагрузочных тестов и CI.
+
+Говорит на том же протоколе, что и настоящий API, включая потоковый режим
+(`completionOptions.stream: true` — JSON-объекты по одному на строку с
+накопленным текстом). Задержки, доля ошибок 429/5xx, зависания и скорость
+генерации токенов настраиваются ключами запуска или на лету через
+POST /_stub/config. Пример:
+
+    python yandex_gpt_stub.py --port 8081 --latency lognormal:400:0.6 --rate-429 0.05
+    YANDEX_GPT_BASE_URL=http://127.0.0.1:8081 python web_app.py
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+
+from flask import Flask, Response, jsonify, request
+
+app = Flask(__name__)
+
+# - Настройки заглушки (меняются через /_stub/config) -
+CONFIG = {
+    "latency": "fixed:200",       # fixed:MS | uniform:MIN:MAX | lognormal:MEDIAN_MS:SIGMA
+    "rate_429": 0.0,              # доля ответов 429 Too Many Requests
+    "rate_5xx": 0.0,              # доля ответов 500/502/503
+    "rate_timeout": 0.0,          # доля запросов, которые "зависают"
+    "timeout_seconds": 30.0,      # сколько держать зависший запрос
+    "tokens_per_second": 0.0,     # скорость генерации; 0 — без задержки на токены
+    "answer_tokens": 60,          # длина ответа в словах (примерно токенах)
+    "model_version": "stub-1.0",
+}
+
+STATS = {"requests": 0, "stream_requests": 0, "ok": 0, "429": 0, "5xx": 0, "timeouts": 0, "bad_request": 0}
+_stats_lock = threading.Lock()
+_random = random.Random()
+
+ANSWER_WORDS = (
+    "D-Space рад помочь 🎉 У нас есть VR-зоны, батутный центр и нерф-арена. "
+    "Уточните количество гостей и удобную дату, и мы подберём программу. "
+    "Хотите забронировать время или узнать цены подробнее?"
+).split()
+
+def count(key):
+    with _stats_lock:
+        STATS[key] += 1
+
+def parse_latency(spec):
+    """Разбирает описание распределения задержки; возвращает функцию → секунды"""
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    if kind == "fixed":
+        return lambda: values[0] / 1000.0
+    if kind == "uniform":
+        low, high = values
+        return lambda: _random.uniform(low, high) / 1000.0
+    if kind == "lognormal":
+        median_ms, sigma = values
+        mu = math.log(median_ms)
+        return lambda: _random.lognormvariate(mu, sigma) / 1000.0
+    raise ValueError(f"Неизвестное распределение задержки: {spec}")
+
+def estimate_tokens(text):
+    return max(1, len(text.split()))
+
+def build_answer(messages, max_tokens):
+    """Детерминированный по длине ответ, повторяющий вопрос пользователя"""
+    question = next((m.get("text", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    words = [f"Ответ на «{question[:60]}»:"]
+    while len(words) < CONFIG["answer_tokens"]:
+        words.extend(ANSWER_WORDS)
+    words = words[:CONFIG["answer_tokens"]]
+    truncated = len(words) > max_tokens
+    return words[:max_tokens], truncated
+
+def completion_result(text, status, input_tokens, completion_tokens):
+    return {
+        "result": {
+            "alternatives": [{"message": {"role": "assistant", "text": text}, "status": status}],
+            "usage": {
+                "inputTextTokens": str(input_tokens),
+                "completionTokens": str(completion_tokens),
+                "totalTokens": str(input_tokens + completion_tokens),
+            },
+            "modelVersion": CONFIG["model_version"],
+        }
+    }
+
+def injected_failure():
+    """Возвращает HTTP-ответ с ошибкой, если её нужно сымитировать, иначе None"""
+    roll = _random.random()
+    if roll < CONFIG["rate_timeout"]:
+        count("timeouts")
+        time.sleep(CONFIG["timeout_seconds"])
+        return jsonify({"error": {"grpcCode": 4, "httpCode": 504, "message": "Deadline exceeded"}}), 504
+    roll -= CONFIG["rate_timeout"]
+    if roll < CONFIG["rate_429"]:
+        count("429")
+        return jsonify({"error": {"grpcCode": 8, "httpCode": 429, "message": "Too many requests"}}), 429
+    roll -= CONFIG["rate_429"]
+    if roll < CONFIG["rate_5xx"]:
+        count("5xx")
+        status = _random.choice([500, 502, 503])
+        return jsonify({"error": {"grpcCode": 13, "httpCode": status, "message": "Internal error"}}), status
+    return None
+
+@app.route("/foundationModels/v1/completion", methods=["POST"])
+def completion():
+    """Эмуляция POST /foundationModels/v1/completion"""
+    count("requests")
+    payload = request.get_json(silent=True) or {}
+    messages = payload.get("messages")
+    if not payload.get("modelUri") or not isinstance(messages, list) or not messages:
+        count("bad_request")
+        return jsonify({"error": {"grpcCode": 3, "httpCode": 400, "message": "modelUri and messages are required"}}), 400
+
+    time.sleep(LATENCY())
+    failure = injected_failure()
+    if failure is not None:
+        return failure
+
+    options = payload.get("completionOptions", {})
+    max_tokens = int(options.get("maxTokens") or 1000)
+    words, truncated = build_answer(messages, max_tokens)
+    input_tokens = sum(estimate_tokens(m.get("text", "")) for m in messages)
+    final_status = "ALTERNATIVE_STATUS_TRUNCATED_FINAL" if truncated else "ALTERNATIVE_STATUS_FINAL"
+    per_token = 1.0 / CONFIG["tokens_per_second"] if CONFIG["tokens_per_second"] > 0 else 0.0
+
+    if options.get("stream"):
+        count("stream_requests")
+
+        def generate():
+            # Как и настоящий API: каждая строка содержит весь накопленный текст
+            for i in range(1, len(words) + 1):
+                if per_token:
+                    time.sleep(per_token)
+                status = final_status if i == len(words) else "ALTERNATIVE_STATUS_PARTIAL"
+                chunk = completion_result(" ".join(words[:i]), status, input_tokens, i)
+                yield json.dumps(chunk, ensure_ascii=False) + "\n"
+            count("ok")
+
+        return Response(generate(), mimetype="application/json")
+
+    if per_token:
+        time.sleep(per_token * len(words))
+    count("ok")
+    return jsonify(completion_result(" ".join(words), final_status, input_tokens, len(words)))
+
+@app.route("/_stub/config", methods=["GET", "POST"])
+def stub_config():
+    """Просмотр и изменение настроек заглушки на лету"""
+    global LATENCY
+    if request.method == "POST":
+        updates = request.get_json(silent=True) or {}
+        unknown = set(updates) - set(CONFIG)
+        if unknown:
+            return jsonify({"error": f"Неизвестные параметры: {sorted(unknown)}"}), 400
+        if "latency" in updates:
+            LATENCY = parse_latency(updates["latency"])
+        CONFIG.update(updates)
+    return jsonify(CONFIG)
+
+@app.route("/_stub/stats", methods=["GET", "DELETE"])
+def stub_stats():
+    """Счётчики обработанных запросов (DELETE — обнулить)"""
+    with _stats_lock:
+        if request.method == "DELETE":
+            for key in STATS:
+                STATS[key] = 0
+        return jsonify(dict(STATS))
+
+LATENCY = parse_latency(CONFIG["latency"])
+
+def main():
+    global LATENCY
+    parser = argparse.ArgumentParser(description='Заглушка Yandex GPT для тестов без сети')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', default=CONFIG["latency"],
+                        help='fixed:MS | uniform:MIN:MAX | lognormal:MEDIAN_MS:SIGMA')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Доля ответов 429')
+    parser.add_argument('--rate-5xx', type=float, default=0.0, help='Доля ответов 5xx')
+    parser.add_argument('--rate-timeout', type=float, default=0.0, help='Доля зависающих запросов')
+    parser.add_argument('--timeout-seconds', type=float, default=30.0, help='Длительность зависания')
+    parser.add_argument('--tokens-per-second', type=float, default=0.0, help='Скорость генерации (0 — мгновенно)')
+    parser.add_argument('--answer-tokens', type=int, default=60, help='Длина ответа в токенах')
+    parser.add_argument('--seed', type=int, help='Seed генератора случайных чисел')
+    args = parser.parse_args()
+
+    CONFIG.update({
+        "latency": args.latency,
+        "rate_429": args.rate_429,
+        "rate_5xx": args.rate_5xx,
+        "rate_timeout": args.rate_timeout,
+        "timeout_seconds": args.timeout_seconds,
+        "tokens_per_second": args.tokens_per_second,
+        "answer_tokens": args.answer_tokens,
+    })
+    LATENCY = parse_latency(args.latency)
+    if args.seed is not None:
+        _random.seed(args.seed)
+
+    print(f"🤖 Заглушка Yandex GPT: http://{args.host}:{args.port}")
+    print(f"💡 Для приложения: YANDEX_GPT_BASE_URL=http://{args.host}:{args.port}")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+if __name__ == '__main__':
+    main()